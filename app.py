@@ -1,14 +1,23 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import plotly.express as px
-import bcrypt
 import time
 import uuid
-import unicodedata
+import secrets
 import extra_streamlit_components as stx
-import requests
-import json
+import os
+from fontes_dados import FonteDiretorio, FonteGitHub
+from snapshot_gist import ArmazemGist
+from dataset_escala import AtualizadorDataset, normalizar_texto
+from compilador_abas import CompiladorAbas
+from kpis_escala import filtrar_e_ordenar_dim
+from consistencia_escala import PROBLEMAS, relatorio_csv
+from dimensionamento import SLA_ALVO_PADRAO, TEMPO_ALVO_PADRAO, TMA_PADRAO, MotorDimensionamento
+from resultados_cx import IndiceMetricas
+from autenticacao import RegistroSessoes, VerificadorSenhas, assinar_token, derivar_segredo, verificar_token
+from telemetria import TELEMETRIA
+from tabela_html import CSS_TABELA, CacheTabelas, calcular_janela_datas, recortar_janela, renderizar_tabela_html
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(
@@ -52,9 +61,10 @@ st.markdown("""
             overflow-y: auto; overflow-x: auto; display: block;
             border: 1px solid #444; border-radius: 4px; background-color: #0e1117;
         }
-        .height-mensal { height: calc(100vh - 310px); }
-        .height-diaria { height: calc(100vh - 330px); }
-        .height-diaria-plantao { height: calc(100vh - 315px); }
+        /* Descontam também a linha de controles da janela (◀ Dias / Mais linhas) */
+        .height-mensal { height: calc(100vh - 350px); }
+        .height-diaria { height: calc(100vh - 370px); }
+        .height-diaria-plantao { height: calc(100vh - 355px); }
         table { width: 100%; border-collapse: separate; border-spacing: 0; font-family: sans-serif; font-size: 11px; }
         
         /* AJUSTE DE LARGURA: min-width garante que as colunas do final não fiquem espremidas */
@@ -121,352 +131,330 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Cores das células da escala (classes fixas geradas por renderizar_tabela_html)
+st.markdown(f"<style>{CSS_TABELA}</style>", unsafe_allow_html=True)
+
 # --- CONSTANTES ---
 LINK_FORMULARIO = "https://docs.google.com/forms/u/0/d/e/1FAIpQLScWvMZ60ISW6RqF0_ZxN_hD5ugOCITUQRlqiFi249EvmLbXyQ/formResponse"
 LINK_FORM_FERIAS = "https://docs.google.com/forms/d/e/1FAIpQLSfojdNvqnBvvMBHD6rkLyjXySQ8PJFT4qcI3_8FKzG2wVmQwQ/viewform"
 LINK_FORM_DAYOFF = "https://docs.google.com/forms/d/e/1FAIpQLSfEJV517mWxn7lY5hduClsErjK39lIz_YNTcpQVq_HZBm4gvg/viewform"
 
 # O Streamlit vai puxar do cofre invisível
-GIST_ID = st.secrets["GIST_ID"]
-GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
+# FONTE_DADOS = "diretorio" + PASTA_DADOS roda com arquivos locais; GIST_API_URL aponta
+# para outro servidor no formato da API (ex.: python fontes_dados.py, offline)
+FONTE_DADOS = st.secrets.get("FONTE_DADOS", "github")
+GIST_ID = st.secrets.get("GIST_ID", "")
+GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN", "")
+PASTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_escala")
+INTERVALO_ATUALIZACAO = 120  # segundos entre revalidações (304 quando nada mudou)
+# Previsão de volume por intervalo (CSV ou JSON) ao lado dos dados: PASTA_DADOS ou a pasta do app
+PASTA_PREVISAO = st.secrets.get("PASTA_DADOS", os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_PREVISAO = st.secrets.get("ARQUIVO_PREVISAO")
+ARQUIVOS_PREVISAO = [ARQUIVO_PREVISAO] if ARQUIVO_PREVISAO else [
+    os.path.join(PASTA_PREVISAO, "previsao_volume.csv"), os.path.join(PASTA_PREVISAO, "previsao_volume.json"),
+]
 
 # ==========================================
 # 🚀 O NOVO MOTOR DE DADOS (PULL DO GITHUB)
 # ==========================================
-@st.cache_data(ttl=600, show_spinner=False)
-def fetch_gist_file(nome_do_arquivo):
-    """Baixa um arquivo específico do nosso Data Lake no GitHub."""
-    url = f"https://api.github.com/gists/{GIST_ID}"
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json"
-    }
-    try:
-        resposta = requests.get(url, headers=headers)
-        if resposta.status_code == 200:
-            dados_gist = resposta.json()
-            
-            # Verifica se o arquivo que pedimos realmente existe lá
-            if nome_do_arquivo not in dados_gist["files"]:
-                st.error(f"Arquivo {nome_do_arquivo} não encontrado no Gist.")
-                return {}
-                
-            arquivo_info = dados_gist["files"][nome_do_arquivo]
-            
-            # Se o JSON for gigante (> 1MB), pegamos a URL bruta
-            if arquivo_info.get("truncated", False):
-                raw_url = arquivo_info["raw_url"]
-                raw_resp = requests.get(raw_url, headers=headers)
-                conteudo_str = raw_resp.text
-            else:
-                conteudo_str = arquivo_info["content"]
-                
-            return json.loads(conteudo_str)
-        else:
-            st.error(f"Erro ao conectar no GitHub: {resposta.status_code}")
-            return {}
-    except Exception as e:
-        st.error(f"🚨 Falha interna ao processar {nome_do_arquivo}: {e}")
-        return {}
-
-def normalizar_texto(texto):
-    """Remove acentos e deixa maiúsculo (ex: LÍDER -> LIDER)"""
-    return ''.join(c for c in unicodedata.normalize('NFD', str(texto))
-                  if unicodedata.category(c) != 'Mn').upper().strip()
-
-@st.cache_data(ttl=600, show_spinner=False)
-def listar_abas_dim():
-    data = fetch_gist_file("escala_cx.json")
-    dims = data.get("DIMs", {})
-    return sorted(list(dims.keys()))
-
-# 1. FUNÇÃO PESADA (Refatorada para ler da memória)
-@st.cache_data(ttl=600, show_spinner=False)
-def carregar_dados_aba(nome_aba):
-    data = fetch_gist_file("escala_cx.json")
-    
-    # Identifica se a requisição é de um Mês ou de um DIM
-    dados = []
-    if nome_aba in data.get("Meses", {}):
-        dados = data["Meses"][nome_aba]
-    elif nome_aba in data.get("DIMs", {}):
-        dados = data["DIMs"][nome_aba]
+@st.cache_resource(show_spinner=False)
+def get_atualizador():
+    """Snapshot único do Gist por processo + thread que revalida e reprocessa em background."""
+    if FONTE_DADOS == "diretorio":
+        fonte = FonteDiretorio(st.secrets["PASTA_DADOS"])
     else:
-        return None, None
+        fonte = FonteGitHub(GIST_ID, GITHUB_TOKEN, url_api=st.secrets.get("GIST_API_URL"))
+    armazem = ArmazemGist(fonte, PASTA_CACHE, ttl=600)
+    # Abas compiladas em Arrow por hash de conteúdo: outros processos reaproveitam do disco
+    compilador = CompiladorAbas(PASTA_CACHE)
+    return AtualizadorDataset(armazem, intervalo=INTERVALO_ATUALIZACAO, compilador=compilador).iniciar()
 
-    if not dados:
-        return None, None
+# Cada execução do script roda num módulo novo, então esta variável vale só
+# para o rerun atual: todas as telas leem a MESMA versão, mesmo se o
+# AtualizadorDataset trocar de versão no meio do caminho.
+_dataset_da_execucao = None
 
-    try:
-        # 1. Localizar Cabeçalho
-        indice_cabecalho = -1
-        cabecalho_bruto = []
-        
-        for i, linha in enumerate(dados[:15]):
-            linha_norm = [normalizar_texto(col) for col in linha]
-            
-            tem_nome = "NOME" in linha_norm or "NOMES" in linha_norm
-            tem_lider = "LIDER" in linha_norm
-            tem_horario = any("HORARIO" in col for col in linha_norm)
-            
-            if tem_nome and (tem_lider or tem_horario):
-                indice_cabecalho = i
-                cabecalho_bruto = linha 
-                break
-        
-        if indice_cabecalho == -1: return None, None
-
-        # 2. Tratamento do Cabeçalho
-        cabecalho_tratado = []
-        contagem_cols = {}
-        for col in cabecalho_bruto:
-            col_str = normalizar_texto(col) 
-            if col_str == "NOMES": col_str = "NOME"
-            
-            if col_str in contagem_cols:
-                contagem_cols[col_str] += 1
-                cabecalho_tratado.append(f"{col_str} ") 
-            else:
-                if col_str != "": contagem_cols[col_str] = 1
-                cabecalho_tratado.append(col_str)
+def get_dataset():
+    """Handle da versão do dataset desta execução (objeto compartilhado, somente leitura)."""
+    global _dataset_da_execucao
+    if _dataset_da_execucao is None:
+        _dataset_da_execucao = get_atualizador().atual()
+    return _dataset_da_execucao
 
-        linhas = dados[indice_cabecalho + 1:]   
-        df = pd.DataFrame(linhas, columns=cabecalho_tratado)
-        df = df.loc[:, df.columns != ''] 
-        
-        # 3. FILTRAGEM
-        if 'NOME' in df.columns: 
-             df = df[df['NOME'].astype(str).str.strip() != '']
+@st.cache_resource(show_spinner=False)
+def get_motor_dimensionamento():
+    """Previsão de volume + curvas Erlang C por dia, compartilhadas entre sessões."""
+    return MotorDimensionamento(ARQUIVOS_PREVISAO)
 
-        if 'ILHA' in df.columns: 
-            # --- CORREÇÃO: Lista de palavras que não podem ser deletadas ---
-            lista_separadores = ['FINANCEIRO', 'E-MAIL', 'ASSÍNCRONO', 'ASSINCRONO', 'FINANCEIRO ASSÍNCRONO', 'PLENO', 'STAFF', 'N2']
-            
-            # Condição 1: A ilha não é vazia
-            mask_ilha_preenchida = df['ILHA'].astype(str).str.strip() != ''
-            # Condição 2: O nome é um dos nossos separadores VIP
-            mask_eh_separador = df['NOME'].astype(str).str.upper().str.strip().isin(lista_separadores)
-            
-            # Mantém a linha se ela passar na Condição 1 OU na Condição 2
-            df = df[mask_ilha_preenchida | mask_eh_separador]
+PAPEIS_LIDERANCA = {"lider", "líder", "leader", "admin"}
 
-        # 4. LIMPEZA DE DADOS
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str).str.strip()
+def eh_lideranca(usuario, desenvolvedores):
+    papeis = {str(p).strip().lower() for p in st.session_state.get("roles", [])}
+    return bool(papeis & PAPEIS_LIDERANCA) or usuario in desenvolvedores
 
-        if len(df.columns) > 35: 
-            df = df.iloc[:, :40] 
-            
-        return df, None
+def buscar_aba_dim(data):
+    dataset = get_dataset()
+    return dataset.aba_dim_do_dia(data) if dataset else None
+
+def carregar_cobertura_periodo(inicio, fim, lideres, ilhas, busca_nome):
+    """([(data, aba)], cubo, agentes em CHAT dia x horário) das DIMs do período, numa chamada só."""
+    dataset = get_dataset()
+    if dataset is None: return [], None, None
+    dias = dataset.abas_dim_intervalo(inicio, fim)
+    if not dias: return [], None, None
+    cubo, cobertura = dataset.cobertura_chat_periodo([nome for _, nome in dias], lideres, ilhas, busca_nome)
+    return dias, cubo, cobertura
 
-    except Exception as e:
-        print(f"Erro: {e}")
-        return None, None
+# 1. FUNÇÃO PESADA (já processada em background pelo AtualizadorDataset)
+def carregar_dados_aba(nome_aba):
+    dataset = get_dataset()
+    if dataset is None: return None, None
+    return dataset.aba(nome_aba), None
 
 # 2. FUNÇÃO LEVE (Lê Pessoas)
-@st.cache_data(ttl=600, show_spinner=False)
 def carregar_lista_pessoas():
-    data = fetch_gist_file("escala_cx.json")
-    dados = data.get("Pessoas", [])
-    if not dados: return [], []
-    
-    try:
-        df = pd.DataFrame(dados)
-        df.columns = [str(c).upper().strip() for c in df.columns]
-        
-        lideres = []
-        ilhas = []
-        
-        col_lider = next((c for c in df.columns if 'LIDER' in c), None)
-        if col_lider:
-            lideres = sorted([str(x).strip() for x in df[col_lider].unique() if str(x).strip() != ''])
-            
-        col_ilha = next((c for c in df.columns if 'ILHA' in c), None)
-        if col_ilha:
-            ilhas = sorted([str(x).strip() for x in df[col_ilha].unique() if str(x).strip() != ''])
-            
-        return lideres, ilhas
-    except Exception as e:
-        print(f"Erro ao ler Pessoas: {e}")
-        return [], []
+    dataset = get_dataset()
+    if dataset is None: return [], []
+    return dataset.lideres, dataset.ilhas
 
 # ==========================================
 # FUNÇÃO PARA LER PLANTÃO FDS
 # ==========================================
-@st.cache_data(ttl=600, show_spinner=False)
-def carregar_plantao_dia(data_str):
-    data = fetch_gist_file("escala_cx.json")
-    dados = data.get("ESCALA 26 STAFF", [])
-    if not dados or len(dados) < 3: return None
-    
-    try:
-        for linha in dados:
-            if len(linha) >= 7: 
-                data_planilha = str(linha[1]).strip() 
-                if data_planilha == data_str:
-                    staff = str(linha[2]).strip()     
-                    urgencia = str(linha[5]).strip()  
-                    telefone = str(linha[6]).strip()  
-                    
-                    if staff or urgencia:
-                        return {"staff": staff, "urgencia": urgencia, "telefone": telefone}
-        return None
-    except Exception as e:
-        return None
+def carregar_plantao_dia(data):
+    dataset = get_dataset()
+    if dataset is None: return None
+    return dataset.plantao_dia(data)
+
+def carregar_indice_metricas():
+    """Resultados_Atuais indexado por e-mail: a tela de resultados faz uma única consulta."""
+    dataset = get_dataset()
+    if dataset is None: return IndiceMetricas(None)
+    return dataset.metricas
+
+def carregar_plantoes_intervalo(inicio, fim):
+    dataset = get_dataset()
+    if dataset is None: return []
+    return dataset.plantoes_intervalo(inicio, fim)
+
+def carregar_kpis_mensais(nome_aba, data_escolhida):
+    """Cards do mês como consulta ao cubo pré-calculado junto com a aba."""
+    with TELEMETRIA.medir("kpis_mensais"):
+        matriz = get_dataset().kpi_mensal(nome_aba)
+        return matriz.kpis(data_escolhida), matriz.picos_vales()
+
+@st.cache_resource(show_spinner=False)
+def get_cache_tabelas():
+    """HTML das grades compartilhado entre sessões (a visão padrão é igual para quase todos)."""
+    return CacheTabelas(max_itens=200)
 
 # ==========================================
-# FUNÇÕES DE CÁLCULO
+# JANELA DA GRADE (SÓ O PEDAÇO VISÍVEL VAI PRO NAVEGADOR)
 # ==========================================
-def calcular_picos_vales_mensal(df_mensal):
-    cols_data = [c for c in df_mensal.columns if '/' in c]
-    if not cols_data: return None
-    if 'ILHA' in df_mensal.columns:
-        mask = df_mensal['ILHA'].astype(str).str.contains('Suporte|Emergência|Emergencia', case=False, na=False)
-        df_filtrado = df_mensal[mask]
-    else: df_filtrado = df_mensal
-    max_val = -1; max_dia = "-"; min_val = 9999; min_dia = "-"
-    for dia in cols_data:
-        qtd_t = df_filtrado[dia].astype(str).str.upper().str.strip().value_counts().get("T", 0)
-        if qtd_t > max_val: max_val = qtd_t; max_dia = dia
-        if qtd_t < min_val: min_val = qtd_t; min_dia = dia
-    return {"max_dia": max_dia, "max_val": max_val, "min_dia": min_dia, "min_val": min_val}
-
-def calcular_kpis_mensal_detalhado(df_mensal, data_escolhida):
-    metrics = {"NoChat": 0, "Folga": 0, "Suporte": 0, "Emergencia": 0}
-    if data_escolhida in df_mensal.columns:
-        metrics["Folga"] = df_mensal[data_escolhida].value_counts().get("F", 0)
-        if 'ILHA' in df_mensal.columns:
-            mask_trabalhando = df_mensal[data_escolhida] == 'T'
-            mask_ilhas_chat = df_mensal['ILHA'].astype(str).str.contains('Suporte|Emergência|Emergencia', case=False, na=False)
-            metrics["NoChat"] = len(df_mensal[mask_trabalhando & mask_ilhas_chat])
-            df_t = df_mensal[mask_trabalhando]
-            metrics["Suporte"] = df_t[df_t['ILHA'].str.contains("Suporte", case=False, na=False)].shape[0]
-            metrics["Emergencia"] = df_t[df_t['ILHA'].str.contains("Emergência|Emergencia", case=False, na=False)].shape[0]
-    return metrics
-
-def calcular_resumo_dia_dim(df_dim):
-    cols_horarios = [c for c in df_dim.columns if ':' in c]
-    if not cols_horarios: return {"Trabalhando": 0, "Folga": 0}
-    resumo = df_dim[cols_horarios].apply(lambda row: "".join([str(val).upper() for val in row]), axis=1)
-    eh_sup_emerg = df_dim['ILHA'].astype(str).str.contains('Suporte|Emergência|Emergencia', case=False, na=False)
-    tem_trabalho = resumo.str.contains('CHAT|EMAIL|E-MAIL|P|TREINO|1:1|FINANCEIRO')
-    return {"Trabalhando": resumo.str.contains('CHAT').sum(), "Folga": ((resumo.str.contains('F')) & (~tem_trabalho) & (eh_sup_emerg)).sum()}
-
-def analisar_gargalos_dim(df_dim):
-    cols_horarios = [c for c in df_dim.columns if ':' in c]
-    cols_horarios = [c for c in cols_horarios if 9 <= int(c.split(':')[0]) <= 22]
-    if not cols_horarios: return None
-    min_chat = 9999; min_h = "-"; max_pausa = -1; max_h = "-"
-    for hora in cols_horarios:
-        col = df_dim[hora].astype(str).str.upper().str.strip()
-        qt_chat = col.eq('CHAT').sum(); qt_pausa = col.isin(['P', 'PAUSA']).sum()
-        if qt_chat < min_chat: min_chat = qt_chat; min_h = hora
-        if qt_pausa > max_pausa: max_pausa = qt_pausa; max_h = hora
-    return {"min_chat_hora": min_h, "min_chat_valor": min_chat, "max_pausa_hora": max_h, "max_pausa_valor": max_pausa}
-
-def filtrar_e_ordenar_dim(df, modo):
-    df_f = df.copy()
-    cols_h = [c for c in df.columns if ':' in c]
-    df_f['SORT_TEMP'] = pd.to_datetime(df_f['ENTRADA'], format='%H:%M', errors='coerce') if 'ENTRADA' in df_f.columns else pd.NaT
-    if modo == "💬 Apenas Chat":
-        mask = df_f[cols_h].apply(lambda row: row.astype(str).str.upper().str.contains('CHAT').any(), axis=1)
-        df_f = df_f[mask].sort_values(by='SORT_TEMP', na_position='last')
-    elif modo == "🚫 Apenas Folgas":
-        mask = df_f[cols_h].apply(lambda row: 'F' in "".join([str(v).upper() for v in row]) and not any(x in "".join([str(v).upper() for v in row]) for x in ['CHAT', 'P', 'TREINO']), axis=1)
-        df_f = df_f[mask].sort_values(by='SORT_TEMP', na_position='last')
-    return df_f.drop(columns=['SORT_TEMP'])
-
-def renderizar_tabela_html(df, modo_cores='diario', classe_altura='height-diaria'):
-    def style_row(row):
-        styles = []
-        nome_linha = str(row['NOME']).upper().strip() if 'NOME' in row else ''
-        eh_cabecalho = nome_linha in [
-            'FINANCEIRO', 'E-MAIL', 'ASSÍNCRONO', 
-            'PLENO', 'STAFF', 'N2'
-        ]
-        
-        for col, val in row.items():
-            val_str = str(val).upper().strip()
-            style = ''
-            
-            if eh_cabecalho:
-                style = 'background-color: #000000; color: white; font-weight: bold;'
-            else:
-                if val_str == 'FR': 
-                    style = 'background-color: #ffffff; color: black'
-                elif val_str == 'AF': 
-                    style = 'background-color: #f4cccc; color: black'
-
-                if modo_cores == 'mensal':
-                    if val_str == 'T': style = 'background-color: #c9daf8; color: black'
-                    elif val_str == 'F': style = 'background-color: #93c47d; color: black'
-                else:
-                    if val_str == 'F': style = 'background-color: #002060; color: white'
-                    elif val_str == 'RT': style = 'background-color: #e6cff2; color: black'
-                    elif val_str == 'REEMBOLSOS': style = 'background-color: #d4edbc; color: black'
-                    elif 'CHAT' in val_str: style = 'background-color: #d9ead3; color: black'
-                    elif 'PAUSA' in val_str or val_str == 'P': style = 'background-color: #fce5cd; color: black'
-                    elif 'EMAIL' in val_str or 'E-MAIL' in val_str: style = 'background-color: #bfe1f6; color: black'
-                    elif 'FINANCEIRO' in val_str: style = 'background-color: #11734b; color: white'
-                    elif 'BACKOFFICE' in val_str: style = 'background-color: #5a3286; color: white'
-        
-            styles.append(style)
-        return styles
+LINHAS_POR_JANELA = 60
+DIAS_POR_LADO = 7
+
+def estado_janela(chave_estado, chave_dados):
+    """Janela da sessão; volta ao padrão quando muda a aba ou o dia selecionado."""
+    janela = st.session_state.get(chave_estado)
+    if not janela or janela["chave"] != chave_dados:
+        janela = {"chave": chave_dados, "antes": DIAS_POR_LADO, "depois": DIAS_POR_LADO, "linhas": LINHAS_POR_JANELA}
+        st.session_state[chave_estado] = janela
+    return janela
+
+def grade_com_janela(df, colunas_datas, dia_centro, chave_estado, chave_dados):
+    """Desenha os controles de janela e devolve só as linhas/colunas visíveis + o recorte usado."""
+    janela = estado_janela(chave_estado, chave_dados)
+    ini, fim = calcular_janela_datas(colunas_datas, dia_centro, janela["antes"], janela["depois"])
 
-    styler = df.style.apply(style_row, axis=1)
-    return f'<div class="table-container {classe_altura}">{styler.hide(axis="index").to_html()}</div>'
+    c_info, c_antes, c_depois, c_mais = st.columns([3, 1, 1, 1])
+    if colunas_datas:
+        with c_antes:
+            if st.button("◀ Dias anteriores", key=f"{chave_estado}_antes", disabled=ini == 0, use_container_width=True):
+                janela["antes"] += DIAS_POR_LADO
+        with c_depois:
+            if st.button("Próximos dias ▶", key=f"{chave_estado}_depois", disabled=fim >= len(colunas_datas), use_container_width=True):
+                janela["depois"] += DIAS_POR_LADO
+    with c_mais:
+        if st.button("⬇ Mais linhas", key=f"{chave_estado}_linhas", disabled=janela["linhas"] >= len(df), use_container_width=True):
+            janela["linhas"] += LINHAS_POR_JANELA
+
+    ini, fim = calcular_janela_datas(colunas_datas, dia_centro, janela["antes"], janela["depois"])
+    df_janela = recortar_janela(df, colunas_datas, colunas_datas[ini:fim], janela["linhas"])
+
+    with c_info:
+        info = f"Mostrando {len(df_janela)} de {len(df)} linhas"
+        if colunas_datas:
+            info += f" · {colunas_datas[ini]} a {colunas_datas[fim - 1]}"
+        st.caption(info)
+    return df_janela, (ini, fim, janela["linhas"])
+
+# Aquecimento: a primeira execução do processo (normalmente a tela de login)
+# já cria o atualizador, que monta snapshot + abas no pool em background.
+# Não espera nada aqui; quem precisar do dataset bloqueia em get_dataset().
+get_atualizador()
 
 # ================= SISTEMA DE LOGIN (VIA COOKIES 🍪) =================
 
+# Espera pela primeira resposta do componente de cookies antes de cair no login sem eles
+HANDSHAKE_ESPERA = 0.25  # segundos entre reruns
+HANDSHAKE_MAX_TENTATIVAS = 12
+HANDSHAKE_MAX_SEGUNDOS = 5
+
 def get_cookie_manager():
     return stx.CookieManager(key="turbi_cookie_manager_v2")
 
+def ler_cookies(cookie_manager):
+    """Cookies do navegador, ou None enquanto o componente ainda não respondeu.
+
+    Mesmo componente do get_all(), mas com default None: dá para diferenciar
+    "ainda carregando" de "sem cookies". A resposta do navegador dispara o
+    rerun sozinha; a espera curta no handshake só cobre o caso de ela nunca chegar.
+
+    Chama o componente interno do stx como o get_all() da 0.1.81 (fixada no
+    requirements.txt), inclusive o _remove_extra_spacing() que esconde o iframe vazio.
+    """
+    cookie_manager._remove_extra_spacing()
+    cookies = cookie_manager.cookie_manager(method="getAll", key="get_all", default=None)
+    if cookies is not None:
+        cookie_manager.cookies = cookies
+    return cookies
+
+def aplicar_cookie_pendente(cookie_manager):
+    """Grava/apaga o cookie agendado no login/logout numa execução que vai até o fim
+    (um st.rerun() logo após o set/delete podia cortar o componente antes do navegador)."""
+    pendente = st.session_state.get("cookie_pendente")
+    if not pendente:
+        return
+    # Mesmas chamadas do set()/delete() da stx 0.1.81, mas lendo o retorno do componente
+    cookie_manager._remove_extra_spacing()
+    if pendente["acao"] == "set":
+        feito = cookie_manager.cookie_manager(
+            method="set", cookie="turbi_token", value=pendente["valor"], key="set_cookie", default=False,
+            options={"path": "/", "expires": pendente["expira"], "sameSite": "strict"},
+        )
+    else:
+        feito = cookie_manager.cookie_manager(method="delete", cookie="turbi_token", key="delete_cookie", default=False)
+    if feito:
+        st.session_state.pop("cookie_pendente", None)
+
+def registrar_primeira_tela():
+    """Uma vez por sessão: tempo entre a primeira execução e a primeira tela útil."""
+    inicio = st.session_state.get("t_inicio_sessao")
+    if inicio is None or "tempo_primeira_tela" in st.session_state:
+        return
+    st.session_state["tempo_primeira_tela"] = time.time() - inicio
+    TELEMETRIA.observar("primeira_tela_segundos", st.session_state["tempo_primeira_tela"])
+
+def limpar_sessao():
+    """st.session_state.clear() que mantém a medição da primeira tela desta sessão."""
+    tempos = {k: st.session_state[k] for k in ("t_inicio_sessao", "tempo_primeira_tela") if k in st.session_state}
+    st.session_state.clear()
+    st.session_state.update(tempos)
+
 @st.cache_resource(show_spinner=False)
 def get_session_manager():
-    return {}
+    """Registro e-mail -> sessão dona, compartilhado pelas sessões do processo."""
+    return RegistroSessoes(max_itens=5000, ttl=6 * 3600)
+
+@st.cache_resource(show_spinner=False)
+def get_verificador_senhas():
+    """Pool de bcrypt do processo + limite de tentativas por usuário."""
+    return VerificadorSenhas(max_workers=2, max_fila=32)
+
+@st.cache_resource(show_spinner=False)
+def get_segredo_sessao():
+    """Chave HMAC dos cookies: SESSION_SECRET se existir, senão derivada do token do GitHub.
+    Sem nenhum dos dois (rodando com fonte local), uma chave aleatória por processo."""
+    return derivar_segredo(st.secrets.get("SESSION_SECRET") or GITHUB_TOKEN or secrets.token_hex(32))
+
+MENSAGENS_LOGIN = {
+    VerificadorSenhas.SENHA_INVALIDA: "Acesso negado.",
+    VerificadorSenhas.LIMITE: "Muitas tentativas para este usuário. Aguarde alguns minutos.",
+    VerificadorSenhas.OCUPADO: "Muitos acessos ao mesmo tempo. Tente novamente em instantes.",
+}
 
 def validar_senha(usuario, senha_digitada):
+    """(ok, dados_user, resultado). O bcrypt roda no pool, não na thread do script."""
     try:
         dados_user = st.secrets["credentials"]["usernames"].get(usuario)
-        if not dados_user: return False, None
-        
-        senha_correta = False
-        if dados_user["password"] == senha_digitada: 
-             senha_correta = True
-        elif bcrypt.checkpw(senha_digitada.encode('utf-8'), dados_user["password"].encode('utf-8')):
-             senha_correta = True
-             
-        if senha_correta:
-            return True, dados_user
-        return False, None
-    except Exception: return False, None
+        if not dados_user: return False, None, VerificadorSenhas.SENHA_INVALIDA
+        resultado = get_verificador_senhas().verificar(usuario, senha_digitada, dados_user["password"])
+        if resultado == VerificadorSenhas.OK:
+            return True, dados_user, resultado
+        return False, None, resultado
+    except Exception: return False, None, VerificadorSenhas.SENHA_INVALIDA
 
 def impor_sessao_unica(email):
     manager = get_session_manager()
     
     if "session_id" not in st.session_state:
         st.session_state["session_id"] = str(uuid.uuid4())
-        manager[email] = st.session_state["session_id"]
-    
-    if manager.get(email) != st.session_state["session_id"]:
-        st.warning("⚠️ Conexão desconectada. Esta conta foi aberta em outro local.")
-        time.sleep(3)
-        st.session_state.clear()
-        st.rerun()
+        manager.reivindicar(email, st.session_state["session_id"])
     
-    manager[email] = st.session_state["session_id"]
+    if not manager.confirmar(email, st.session_state["session_id"]):
+        # O aviso sobrevive ao clear e aparece na próxima tela, sem segurar a thread
+        limpar_sessao()
+        st.session_state["aviso_sessao"] = "⚠️ Conexão desconectada. Esta conta foi aberta em outro local."
+        reiniciar_execucao()
+# ==========================================
+# 📈 TELEMETRIA (TEMPOS POR ETAPA)
+# ==========================================
+@st.cache_resource(show_spinner=False)
+def get_telemetria():
+    """Liga os contadores já existentes ao registro do processo e exporta para o coletor."""
+    atualizador = get_atualizador()
+    TELEMETRIA.registrar_fonte("gist", lambda: atualizador.armazem.contadores)
+    TELEMETRIA.registrar_fonte("dataset", lambda: atualizador.contadores)
+    if atualizador.compilador is not None:
+        TELEMETRIA.registrar_fonte("abas", lambda: atualizador.compilador.contadores)
+    TELEMETRIA.registrar_fonte("cache_tabelas", get_cache_tabelas().estatisticas)
+    TELEMETRIA.registrar_fonte("logins", lambda: get_verificador_senhas().contadores)
+    TELEMETRIA.registrar_fonte("sessoes", lambda: {"ativas": get_session_manager().ativas()})
+    # metricas_app.prom / metricas_app.json para um scraper externo (node_exporter textfile etc.)
+    return TELEMETRIA.iniciar_exportacao(os.path.join(PASTA_CACHE, "metricas"), intervalo=30)
+
+def registrar_execucao():
+    """Tempo desta execução do script (do início da lógica até aqui)."""
+    TELEMETRIA.observar("execucao_script_segundos", time.perf_counter() - _inicio_execucao)
+
+# st.stop()/st.rerun() encerram o script com exceção: o tempo é registrado antes,
+# senão login, handshake de cookies e sessão derrubada nunca entrariam no p50/p95
+def parar_execucao():
+    registrar_execucao()
+    st.stop()
+
+def reiniciar_execucao():
+    registrar_execucao()
+    st.rerun()
+
+get_telemetria()
+_inicio_execucao = time.perf_counter()
 
 # --- LÓGICA DE ENTRADA ---
 
+st.session_state.setdefault("t_inicio_sessao", time.time())
+
 cookie_manager = get_cookie_manager()
-cookies = cookie_manager.get_all()
+cookies = ler_cookies(cookie_manager)
+aplicar_cookie_pendente(cookie_manager)
 
-if not st.session_state.get("logado", False) and "startup_check" not in st.session_state:
-    with st.spinner("🔄 Iniciando sistema..."):
-        time.sleep(1)
-        st.session_state["startup_check"] = True
-        st.rerun()
+if cookies is None:
+    tentativas = st.session_state.get("handshake_tentativas", 0)
+    esperando = time.time() - st.session_state.setdefault("t_handshake", time.time())
+    if (not st.session_state.get("logado", False)
+            and tentativas < HANDSHAKE_MAX_TENTATIVAS and esperando < HANDSHAKE_MAX_SEGUNDOS):
+        # Handshake: normalmente a resposta do componente já traz o próximo rerun;
+        # o rerun agendado aqui só garante que a tela não fica parada se ela não vier
+        st.session_state["handshake_tentativas"] = tentativas + 1
+        st.caption("🔄 Iniciando sistema...")
+        time.sleep(HANDSHAKE_ESPERA)
+        reiniciar_execucao()
+    # Componente não respondeu (bloqueado, iframe que não carregou...): segue sem cookies,
+    # com o formulário de login
+    cookies = {}
+else:
+    st.session_state.pop("handshake_tentativas", None)
+    st.session_state.pop("t_handshake", None)
 
 params = st.query_params
 usuario_url = params.get("u")
@@ -477,8 +465,9 @@ ignorar_cookie = st.session_state.get("logout_just_happened", False)
 
 if token_cookie and not st.session_state.get("logado", False) and not ignorar_cookie:
     try:
-        email_cookie = token_cookie.split("|")[0]
-        if email_cookie in st.secrets["credentials"]["usernames"]:
+        # Só HMAC + validade: restaurar a sessão não passa pelo bcrypt
+        email_cookie = verificar_token(token_cookie, get_segredo_sessao())
+        if email_cookie and email_cookie in st.secrets["credentials"]["usernames"]:
             dados = st.secrets["credentials"]["usernames"][email_cookie]
             st.session_state.update({
                 "logado": True, 
@@ -486,18 +475,22 @@ if token_cookie and not st.session_state.get("logado", False) and not ignorar_co
                 "nome": dados["name"], 
                 "roles": dados.get("roles", ["viewer"])
             })
-            st.rerun()
+            reiniciar_execucao()
     except:
         pass 
 
-# 3. Se ainda não logou (mesmo após esperar), mostra Login
+# Aviso de sessão derrubada: mostrado aqui, depois de um eventual login pelo cookie
+if "aviso_sessao" in st.session_state:
+    st.warning(st.session_state.pop("aviso_sessao"))
+
+# 3. Se ainda não logou (cookies já lidos), mostra Login
 if not st.session_state.get("logado", False):
     login_aprovado = False
     email_login = ""
     dados_login = {}
 
     if usuario_url and senha_url:
-        val, dados = validar_senha(usuario_url, senha_url)
+        val, dados, _ = validar_senha(usuario_url, senha_url)
         if val:
             login_aprovado = True
             email_login = usuario_url
@@ -515,13 +508,14 @@ if not st.session_state.get("logado", False):
                 ("### 🔒 Acesso Sistema de Escalas Turbi")
                 i_user = st.text_input("E-mail", placeholder="ex: nome@turbi.com.br")
                 i_pass = st.text_input("Senha", type="password")
+                registrar_primeira_tela()
                 if st.button("Entrar", type="primary", use_container_width=True):
-                    val, dados = validar_senha(i_user.strip(), i_pass)
+                    val, dados, resultado = validar_senha(i_user.strip(), i_pass)
                     if val:
                         login_aprovado = True
                         email_login = i_user.strip()
                         dados_login = dados
-                    else: st.error("Acesso negado.")
+                    else: st.error(MENSAGENS_LOGIN.get(resultado, "Acesso negado."))
     
     if login_aprovado:
         # --- LIMPADOR ATIVADO: Apaga a tela de login fisicamente antes de avançar ---
@@ -534,18 +528,20 @@ if not st.session_state.get("logado", False):
             "roles": dados_login.get("roles", ["viewer"])
         })
         
-        token_seguro = f"{email_login}|{str(uuid.uuid4())}"
-        cookie_manager.set("turbi_token", token_seguro, key="set_cookie", expires_at=datetime.now() + pd.Timedelta(days=1))
-        
-        time.sleep(0.5) 
-        st.rerun()
-    
-    st.stop() 
-
+        token_seguro = assinar_token(email_login, get_segredo_sessao())
+        # Gravado no começo do próximo rerun (aplicar_cookie_pendente), sem sleep
+        st.session_state["cookie_pendente"] = {
+            "acao": "set", "valor": token_seguro, "expira": (datetime.now() + timedelta(days=1)).isoformat(),
+        }
+        reiniciar_execucao()
+    parar_execucao()
 impor_sessao_unica(st.session_state["usuario"])
 
 # ================= APP PRINCIPAL =================
 
+if get_dataset() is None:
+    st.error(f"🚨 Falha ao carregar a escala: {get_atualizador().ultimo_erro or 'Gist indisponível.'}")
+    parar_execucao()
 opcoes_lider, opcoes_ilha = carregar_lista_pessoas()
 
 # --- SIDEBAR ---
@@ -574,6 +570,29 @@ with st.sidebar:
             ["📅 Escala SC", "📊 Meus Resultados"],
             label_visibility="collapsed"
         )
+        est_cache = get_cache_tabelas().estatisticas()
+        st.caption(f"🧩 Cache de tabelas: {est_cache['hits']} hits · {est_cache['misses']} misses · {est_cache['itens']} itens")
+        memoria = get_dataset().relatorio_memoria()
+        st.caption(f"🧠 Abas em memória: {memoria['codificado_bytes'] / 1e6:.1f} MB (como texto seriam {memoria['texto_bytes'] / 1e6:.1f} MB, -{memoria['economia']:.0%})")
+        st.caption(f"👥 Sessões ativas: {get_session_manager().ativas()}")
+        logins = get_verificador_senhas().contadores
+        st.caption(f"🔐 Logins: {logins['ok']} ok · {logins['senha_invalida']} negados · {logins['limite']} limitados · {logins['ocupado']} fila cheia")
+        desempenho = TELEMETRIA.resumo()
+        primeira_tela = desempenho["series"].get("primeira_tela_segundos")
+        if primeira_tela:
+            st.caption(f"⏱️ Primeira tela: p50 {primeira_tela['p50']:.2f}s · p95 {primeira_tela['p95']:.2f}s ({primeira_tela['n']} sessões)")
+        with st.expander("📈 Desempenho por etapa"):
+            linhas_desempenho = [
+                {"Etapa": nome.replace("_segundos", ""), "p50 (ms)": round(serie["p50"] * 1000, 1),
+                 "p95 (ms)": round(serie["p95"] * 1000, 1), "N": serie["n"]}
+                for nome, serie in sorted(desempenho["series"].items()) if nome.endswith("_segundos")
+            ]
+            if linhas_desempenho:
+                st.dataframe(pd.DataFrame(linhas_desempenho), hide_index=True, use_container_width=True)
+            html_bytes = desempenho["series"].get("html_tabela_bytes")
+            if html_bytes:
+                st.caption(f"📦 HTML da grade: p50 {html_bytes['p50'] / 1024:.0f} KB · p95 {html_bytes['p95'] / 1024:.0f} KB")
+            st.caption(" · ".join(f"{nome}: {valor:g}" for nome, valor in sorted(desempenho["contadores"].items())))
         st.divider()
     else:
         # Para a operação normal, o menu nem aparece
@@ -585,6 +604,8 @@ with st.sidebar:
     sel_ilha = st.multiselect("Ilha", options=opcoes_ilha)
     
     busca_nome = st.text_input("Buscar Nome")
+    # Chave de cache da busca: "ana", " Ana " e "ANA" filtram as mesmas linhas (IndiceFiltros)
+    busca_chave = normalizar_texto(busca_nome)
     st.markdown("<hr style='margin: 10px 0px;'>", unsafe_allow_html=True)
     
     # Links Úteis
@@ -595,17 +616,18 @@ with st.sidebar:
     # Empurra o botão de Sair para o final
     st.markdown("<br>", unsafe_allow_html=True) 
     if st.button("🚪 Sair / Logout", type="secondary", use_container_width=True):
-        try:
-            cookie_manager.delete("turbi_token")
-        except:
-            pass
-        
-        st.session_state.clear()
+        limpar_sessao()
         st.session_state["logout_just_happened"] = True
+        # Apagado no começo do próximo rerun (aplicar_cookie_pendente), sem sleep
+        st.session_state["cookie_pendente"] = {"acao": "delete"}
         
         st.query_params.clear()
-        time.sleep(0.5)
-        st.rerun()
+        reiniciar_execucao()
+    # Carimbo da versão em uso (o AtualizadorDataset troca em background)
+    dataset_atual = get_dataset()
+    if dataset_atual is not None:
+        dados_de = datetime.fromtimestamp(dataset_atual.atualizado_em).strftime("%d/%m às %H:%M")
+        st.caption(f"🕒 Dados de {dados_de}")
 
     st.markdown('<div class="footer-simple">Made by <b>Leonardo Arantes</b></div>', unsafe_allow_html=True)
 
@@ -625,9 +647,16 @@ if menu_navegacao == "📅 Escala SC":
         st.caption(f"Filtrando: {texto_busca}")
 
     # --- ABAS INTELIGENTES ---
-    abas = st.tabs(["📅 Visão Mensal", "⏱️ Visão Diária"])
-    aba_mensal, aba_diaria = abas[0], abas[1]
+    nomes_abas = ["📅 Visão Mensal", "⏱️ Visão Diária", "🗓️ Visão por Período"]
+    # Conferência Mês x DIMs só para liderança
+    if eh_lideranca(usuario_logado, desenvolvedores):
+        nomes_abas.append("🧪 Consistência")
+    abas = st.tabs(nomes_abas)
+    aba_mensal, aba_diaria, aba_periodo = abas[0], abas[1], abas[2]
     
+    DIAS_SEMANA = ["SEG", "TER", "QUA", "QUI", "SEX", "SÁB", "DOM"]
+    MAX_DIAS_PERIODO = 31
+
     MAPA_MESES = {
         1: "JANEIRO", 2: "FEVEREIRO", 3: "MARÇO", 4: "ABRIL",
         5: "MAIO", 6: "JUNHO", 7: "JULHO", 8: "AGOSTO",
@@ -656,8 +685,7 @@ if menu_navegacao == "📅 Escala SC":
             dia_show = texto_busca if texto_busca in colunas_datas else (colunas_datas[0] if colunas_datas else None)
             
             if dia_show:
-                kpis = calcular_kpis_mensal_detalhado(df_global, dia_show)
-                picos = calcular_picos_vales_mensal(df_global)
+                kpis, picos = carregar_kpis_mensais(nome_aba_oficial, dia_show)
                 
                 k1, k2, k3, k4, k5, k6 = st.columns(6)
                 
@@ -670,43 +698,60 @@ if menu_navegacao == "📅 Escala SC":
                     with k5: st.metric("📈 Pico(Sup & Emerg)", f"{picos['max_dia']}", f"{picos['max_val']}")
                     with k6: st.metric("📉 Vale(Sup & Emerg)", f"{picos['min_dia']}", f"{picos['min_val']}", delta_color="inverse")
     
-                df_f = df_global.copy()
-                if sel_lider: df_f = df_f[df_f['LIDER'].isin(sel_lider)]
-                if sel_ilha and 'ILHA' in df_f.columns: df_f = df_f[df_f['ILHA'].isin(sel_ilha)]
-                if busca_nome: df_f = df_f[df_f['NOME'].str.contains(busca_nome, case=False)]
+                # Interseção dos índices pré-calculados (sem copiar a aba)
+                df_f = get_dataset().filtrar_aba(nome_aba_oficial, sel_lider, sel_ilha, busca_nome)
                 
                 cols_clean = [c for c in df_f.columns if c.upper().strip() not in ['EMAIL', 'E-MAIL', 'ADMISSAO', 'ILHA', 'Z']]
-                st.markdown(renderizar_tabela_html(df_f[cols_clean], 'mensal', 'height-mensal'), unsafe_allow_html=True)
+                df_janela, recorte = grade_com_janela(df_f[cols_clean], colunas_datas, dia_show, "janela_mensal", (nome_aba_oficial, dia_show))
+                chave_tabela = (nome_aba_oficial, tuple(sel_lider), tuple(sel_ilha), busca_chave, None, 'mensal', recorte)
+                html_tabela = get_cache_tabelas().obter(get_dataset().versao, chave_tabela, lambda: renderizar_tabela_html(df_janela, 'mensal', 'height-mensal'))
+                TELEMETRIA.observar("html_tabela_bytes", len(html_tabela))
+                st.markdown(html_tabela, unsafe_allow_html=True)
             else:
                 st.warning("Não encontrei colunas de data nesta aba.")
     
     with aba_diaria:
-        # 1. Verifica se tem plantão hoje
-        data_plantao_str = data_sel.strftime("%d/%m/%Y")
-        plantao_hoje = carregar_plantao_dia(data_plantao_str)
+        # 1. Verifica se tem plantão hoje e nos próximos 7 dias (calendário indexado, sem varrer a aba)
+        plantao_hoje = carregar_plantao_dia(data_sel)
+        plantoes_semana = carregar_plantoes_intervalo(data_sel, data_sel + timedelta(days=6))
         
-        # 2. DECIDE A ALTURA DA TABELA: Se tem plantão, usa a classe menor
-        classe_altura_dinamica = 'height-diaria-plantao' if plantao_hoje else 'height-diaria'
+        # 2. DECIDE A ALTURA DA TABELA: Se tem a faixa de plantão, usa a classe menor
+        classe_altura_dinamica = 'height-diaria-plantao' if plantao_hoje or plantoes_semana else 'height-diaria'
         
-        if plantao_hoje:
-            st.markdown(f"""
-            <div style="background-color: #1c1e24; border: 1px solid #333; padding: 10px 15px; border-radius: 6px; margin-bottom: 15px; text-align: center;">
-                <span style="font-size: 14px;">🚨 <b>PLANTÃO DE HOJE</b> &nbsp;|&nbsp; 
-                <b>Supervisão:</b> {plantao_hoje['staff']} &nbsp;|&nbsp; 
-                <b>Urgência:</b> {plantao_hoje['urgencia']} &nbsp;|&nbsp; 
-                <b>📞 Telefone:</b> {plantao_hoje['telefone']}</span>
-            </div>
-            """, unsafe_allow_html=True)
+        if plantao_hoje or plantoes_semana:
+            c_banner, c_semana = st.columns([6, 1])
+            with c_banner:
+                if plantao_hoje:
+                    st.markdown(f"""
+                    <div style="background-color: #1c1e24; border: 1px solid #333; padding: 10px 15px; border-radius: 6px; margin-bottom: 15px; text-align: center;">
+                        <span style="font-size: 14px;">🚨 <b>PLANTÃO DE HOJE</b> &nbsp;|&nbsp; 
+                        <b>Supervisão:</b> {plantao_hoje['staff']} &nbsp;|&nbsp; 
+                        <b>Urgência:</b> {plantao_hoje['urgencia']} &nbsp;|&nbsp; 
+                        <b>📞 Telefone:</b> {plantao_hoje['telefone']}</span>
+                    </div>
+                    """, unsafe_allow_html=True)
+                else:
+                    st.caption("Sem plantão cadastrado para hoje. Veja os próximos dias ao lado. 👉")
+            # A semana aparece sempre que houver plantão nos próximos dias, mesmo sem plantão hoje
+            if plantoes_semana:
+                with c_semana:
+                    with st.popover("📅 Próximos", use_container_width=True):
+                        linhas_semana = "\n".join(
+                            f"| **{d.strftime('%d/%m')}** | {p['staff']} | {p['urgencia']} | {p['telefone']} |"
+                            for d, p in plantoes_semana
+                        )
+                        st.markdown("| DIA | SUPERVISÃO | URGÊNCIA | 📞 |\n| :--- | :--- | :--- | :--- |\n" + linhas_semana)
     
-        abas_dim = listar_abas_dim()
-        aba_encontrada = next((a for a in abas_dim if texto_busca in a), None)
+        aba_encontrada = buscar_aba_dim(data_sel)
         
         if aba_encontrada:
             df_dim, _ = carregar_dados_aba(aba_encontrada)
             
             if df_dim is not None:
-                analise = analisar_gargalos_dim(df_dim)
-                resumo = calcular_resumo_dia_dim(df_dim)
+                matriz_dim = get_dataset().matriz_dim(aba_encontrada)
+                with TELEMETRIA.medir("kpis_dim"):
+                    analise = matriz_dim.gargalos()
+                    resumo = matriz_dim.resumo()
                 
                 kc1, kc2, kc3, kc4 = st.columns(4)
                 with kc1: st.metric("👥 No Chat", resumo["Trabalhando"])
@@ -715,20 +760,56 @@ if menu_navegacao == "📅 Escala SC":
                     with kc3: st.metric("⚠️ Menos Chats", f"{analise['min_chat_hora']}", f"{analise['min_chat_valor']}", delta_color="inverse")
                     with kc4: st.metric("☕ Mais Pausas", f"{analise['max_pausa_hora']}", f"{analise['max_pausa_valor']}", delta_color="off")
                 
-                df_dim_f = df_dim.copy()
-                
-                if sel_lider and 'LIDER' in df_dim_f.columns:
-                    df_dim_f = df_dim_f[df_dim_f['LIDER'].isin(sel_lider)]
-                if sel_ilha and 'ILHA' in df_dim_f.columns:
-                    df_dim_f = df_dim_f[df_dim_f['ILHA'].isin(sel_ilha)]
-                if busca_nome and 'NOME' in df_dim_f.columns:
-                    df_dim_f = df_dim_f[df_dim_f['NOME'].str.contains(busca_nome, case=False)]
+                # Necessidade (Erlang C sobre a previsão) x agentes em CHAT na DIM, por hora
+                with st.expander("📐 Necessidade x Escala (Erlang C)"):
+                    cd1, cd2, cd3 = st.columns(3)
+                    with cd1: sla_alvo = st.slider("SLA alvo (%)", 50, 99, int(SLA_ALVO_PADRAO * 100), key="sla_alvo") / 100
+                    with cd2: tempo_alvo = st.number_input("Atender em até (s)", 5, 600, TEMPO_ALVO_PADRAO, step=5, key="tempo_alvo")
+                    with cd3: tma_padrao = st.number_input("TMA padrão (s)", 30, 3600, TMA_PADRAO, step=10, key="tma_padrao",
+                                                           help="Usado nos intervalos em que a previsão não traz TMA.")
+                    motor = get_motor_dimensionamento()
+                    with TELEMETRIA.medir("dimensionamento"):
+                        df_gap = motor.gap(data_sel, matriz_dim, sla_alvo, tma_padrao, tempo_alvo)
+                    if df_gap is None:
+                        if motor.ultimo_erro:
+                            st.error(f"Não consegui ler a previsão de volume: {motor.ultimo_erro}")
+                        else:
+                            st.info(f"Sem previsão de volume para **{texto_busca}**. Esperado em: `{'` ou `'.join(motor.caminhos)}`")
+                    else:
+                        faltas = df_gap[df_gap["Gap"] < 0]
+                        cg1, cg2, cg3 = st.columns(3)
+                        with cg1: st.metric("🔻 Horas com falta", len(faltas))
+                        if not faltas.empty:
+                            pior = df_gap.loc[df_gap["Gap"].idxmin()]
+                            with cg2: st.metric("⚠️ Maior falta", pior["Horário"], f"{int(pior['Gap'])}")
+                        melhor = df_gap.loc[df_gap["Gap"].idxmax()]
+                        if melhor["Gap"] > 0:
+                            with cg3: st.metric("📈 Maior sobra", melhor["Horário"], f"+{int(melhor['Gap'])}", delta_color="off")
+
+                        fig_gap = px.bar(
+                            df_gap.assign(Situação=["Falta" if g < 0 else "Cobre" for g in df_gap["Gap"]]),
+                            x="Horário", y="Gap", color="Situação",
+                            color_discrete_map={"Falta": "#e74c3c", "Cobre": "#11734b"},
+                            hover_data=["Volume", "Necessários", "Escalados"],
+                        )
+                        fig_gap.update_layout(showlegend=False, height=300, margin=dict(l=10, r=10, t=10, b=10))
+                        st.plotly_chart(fig_gap, use_container_width=True)
+                        st.dataframe(
+                            df_gap.assign(**{"SLA Projetado": (df_gap["SLA Projetado"] * 100).round(1)}),
+                            hide_index=True, use_container_width=True,
+                        )
+
+                df_dim_f = get_dataset().filtrar_aba(aba_encontrada, sel_lider, sel_ilha, busca_nome)
                 
                 tipo = st.radio("Modo:", ["▦ Grade", "💬 Apenas Chat", "🚫 Apenas Folgas"], horizontal=True, label_visibility="collapsed")
-                df_exibicao = df_dim_f if tipo == "▦ Grade" else filtrar_e_ordenar_dim(df_dim_f, tipo)
+                df_exibicao = df_dim_f if tipo == "▦ Grade" else filtrar_e_ordenar_dim(df_dim_f, tipo, matriz_dim)
                 
                 cols_v = [c for c in df_exibicao.columns if c.upper().strip() not in ['EMAIL', 'E-MAIL', 'ILHA', 'Z']]
-                st.markdown(renderizar_tabela_html(df_exibicao[cols_v], 'diario', classe_altura_dinamica), unsafe_allow_html=True)
+                df_janela, recorte = grade_com_janela(df_exibicao[cols_v], [], None, "janela_diaria", (aba_encontrada, tipo))
+                chave_tabela = (aba_encontrada, tuple(sel_lider), tuple(sel_ilha), busca_chave, tipo, 'diario', recorte, classe_altura_dinamica)
+                html_tabela = get_cache_tabelas().obter(get_dataset().versao, chave_tabela, lambda: renderizar_tabela_html(df_janela, 'diario', classe_altura_dinamica))
+                TELEMETRIA.observar("html_tabela_bytes", len(html_tabela))
+                st.markdown(html_tabela, unsafe_allow_html=True)
                 
         else:
             st.warning(f"⚠️ A aba diária para **{texto_busca}** não foi encontrada.")
@@ -742,6 +823,74 @@ if menu_navegacao == "📅 Escala SC":
                 </div>
             """, unsafe_allow_html=True)
     
+    with aba_periodo:
+        # Todas as DIMs do período empilhadas de uma vez (cacheado por período e versão dos dados)
+        periodo = st.date_input("Período", value=(data_sel, data_sel + timedelta(days=6)), format="DD/MM/YYYY", key="periodo_dim")
+        p_inicio, p_fim = (periodo[0], periodo[-1]) if isinstance(periodo, (tuple, list)) and periodo else (data_sel, data_sel)
+        if (p_fim - p_inicio).days >= MAX_DIAS_PERIODO:
+            p_fim = p_inicio + timedelta(days=MAX_DIAS_PERIODO - 1)
+            st.caption(f"Período limitado a {MAX_DIAS_PERIODO} dias: até {p_fim.strftime('%d/%m')}.")
+
+        with TELEMETRIA.medir("cobertura_periodo"):
+            dias_periodo, cubo, cobertura = carregar_cobertura_periodo(p_inicio, p_fim, sel_lider, sel_ilha, busca_nome)
+
+        if not dias_periodo:
+            st.warning(f"⚠️ Nenhuma aba diária entre **{p_inicio.strftime('%d/%m')}** e **{p_fim.strftime('%d/%m')}**.")
+        else:
+            rotulos = [f"{DIAS_SEMANA[d.weekday()]} {d.strftime('%d/%m')}" for d, _ in dias_periodo]
+            rotulo_da_aba = dict(zip(cubo.dias, rotulos))
+            extremos = cubo.extremos(cobertura)
+
+            kp1, kp2, kp3 = st.columns(3)
+            with kp1: st.metric("📆 Dias com DIM", f"{len(dias_periodo)} de {(p_fim - p_inicio).days + 1}")
+            if extremos:
+                with kp2: st.metric("⚠️ Menor cobertura", f"{rotulo_da_aba[extremos['min_dia']]} {extremos['min_hora']}", f"{extremos['min_valor']}", delta_color="inverse")
+                with kp3: st.metric("📈 Maior cobertura", f"{rotulo_da_aba[extremos['max_dia']]} {extremos['max_hora']}", f"{extremos['max_valor']}", delta_color="off")
+
+            fig = px.imshow(
+                cobertura, x=cubo.horarios, y=rotulos, text_auto=True, aspect="auto",
+                color_continuous_scale="RdYlGn", labels={"x": "Horário", "y": "Dia", "color": "No Chat"},
+            )
+            fig.update_layout(height=120 + 36 * len(rotulos), margin=dict(l=10, r=10, t=30, b=10),
+                              title="💬 Cobertura de CHAT por dia e horário")
+            fig.update_xaxes(side="top")
+            st.plotly_chart(fig, use_container_width=True)
+
+            sem_dim = (p_fim - p_inicio).days + 1 - len(dias_periodo)
+            if sem_dim:
+                st.caption(f"{sem_dim} dia(s) do período sem aba diária.")
+
+    if len(abas) > 3:
+        with abas[3]:
+            # Calculada em background junto com a versão dos dados (nada roda aqui além dos filtros)
+            relatorios = get_dataset().consistencia
+            if not relatorios:
+                st.info("Nenhuma aba mensal carregada para conferir.")
+            else:
+                meses_conferidos = list(relatorios)
+                mes_padrao = MAPA_MESES.get(data_sel.month)
+                mes_conf = st.selectbox("Mês", meses_conferidos, index=meses_conferidos.index(mes_padrao) if mes_padrao in meses_conferidos else 0, key="mes_consistencia")
+                relatorio = relatorios[mes_conf]
+                sel_problemas = st.multiselect("Problema", PROBLEMAS, key="problemas_consistencia")
+                df_div = get_dataset().consistencia_filtrada(mes_conf, sel_lider, sel_ilha, busca_nome, sel_problemas)
+
+                contagem = df_div["Problema"].value_counts()
+                kc1, kc2, kc3, kc4 = st.columns(4)
+                with kc1: st.metric("📆 DIMs conferidas", len(relatorio.dias))
+                with kc2: st.metric("🛋️ Folga com CHAT", int(contagem.get(PROBLEMAS[0], 0)))
+                with kc3: st.metric("⏳ Escalado sem horário", int(contagem.get(PROBLEMAS[1], 0)))
+                with kc4: st.metric("❓ Fora da DIM", int(contagem.get(PROBLEMAS[2], 0)))
+
+                if df_div.empty:
+                    st.success("✅ Mês e DIMs batem para os filtros selecionados.")
+                else:
+                    st.dataframe(df_div, hide_index=True, use_container_width=True, height=420)
+                    # Gerado direto (a aba só existe para a liderança): o cache de tabelas fica só com HTML
+                    st.download_button(
+                        "⬇️ Baixar relatório (CSV)", data=relatorio_csv(df_div), mime="text/csv",
+                        file_name=f"consistencia_{mes_conf.lower()}_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                    )
+
 elif menu_navegacao == "📊 Meus Resultados":
     
     # --- HEADER DOS RESULTADOS E REGRAS ---
@@ -778,59 +927,24 @@ elif menu_navegacao == "📊 Meus Resultados":
             
     st.divider()
     
-    # 1. Baixa o nosso pacote isolado de Métricas
-    dados_metricas = fetch_gist_file("metricas_cx.json")
+    # 1. Índice e-mail -> resultados (montado uma vez por versão do Gist)
+    indice_metricas = carregar_indice_metricas()
     
-    if dados_metricas and "Resultados_Atuais" in dados_metricas:
-        matriz_resultados = dados_metricas["Resultados_Atuais"]
+    if indice_metricas.estado != "indisponivel":
         
-        indice_cabecalho = -1
-        for i, linha in enumerate(matriz_resultados[:10]):
-            linha_upper = [str(x).upper().strip() for x in linha]
-            if "E-MAIL" in linha_upper or "EMAIL" in linha_upper:
-                indice_cabecalho = i
-                cabecalho = linha_upper
-                break
-                
-        if indice_cabecalho != -1:
-            email_logado = st.session_state.get("usuario", "").strip().lower()
-            linha_usuario = None
+        if indice_metricas.estado == "ok":
+            registro = indice_metricas.buscar(st.session_state.get("usuario", ""))
             
-            for linha in matriz_resultados[indice_cabecalho+1:]:
-                if len(linha) > 1 and str(linha[1]).strip().lower() == email_logado:
-                    linha_usuario = linha
-                    break
-            
-            if linha_usuario:
-                def buscar_valor_por_nome(nome_coluna):
-                    try:
-                        idx = cabecalho.index(nome_coluna)
-                        return str(linha_usuario[idx]).strip()
-                    except (ValueError, IndexError):
-                        return "-"
-
-                # Nomes e Resultados Reais
-                metrica_1_nome = cabecalho[4] if len(cabecalho) > 4 else "Métrica 1"
-                metrica_1_val = linha_usuario[4] if len(linha_usuario) > 4 else "-"
-                metrica_2_nome = cabecalho[5] if len(cabecalho) > 5 else "Métrica 2"
-                metrica_2_val = linha_usuario[5] if len(linha_usuario) > 5 else "-"
-                metrica_3_nome = cabecalho[6] if len(cabecalho) > 6 else "Métrica 3"
-                metrica_3_val = linha_usuario[6] if len(linha_usuario) > 6 else "-"
-                
-                # Metas e Atingimentos
-                meta_1_val = buscar_valor_por_nome("META 1")
-                meta_2_val = buscar_valor_por_nome("META 2")
-                meta_3_val = buscar_valor_por_nome("META 3")
-                ating_1_val = buscar_valor_por_nome("% ATINGIMENTO 1")
-                ating_2_val = buscar_valor_por_nome("% ATINGIMENTO 2")
-                ating_3_val = buscar_valor_por_nome("% ATINGIMENTO 3")
+            if registro:
+                # Nomes, Resultados Reais, Metas e Atingimentos (já numéricos)
+                metrica_1, metrica_2, metrica_3 = registro["metricas"]
 
                 # Consolidado
-                status_final = buscar_valor_por_nome("STATUSFINAL")
-                bonus_final = buscar_valor_por_nome("BONIFICAÇÃO FINAL")
-                pontuacao_final_str = buscar_valor_por_nome("PONTUAÇÃO FINAL")
-                qualidade = buscar_valor_por_nome("QUALIDADE")
-                ncg = buscar_valor_por_nome("NCG")
+                status_final = registro["status_final"]
+                bonus_final = registro["bonus_final"]
+                pontuacao_final_str = registro["pontuacao_str"]
+                qualidade = registro["qualidade"]
+                ncg = registro["ncg"]
                 
                 # ==========================================
                 # 🎨 UI: O HERO BANNER COMBINADO (MÁGICA DO CSS)
@@ -846,10 +960,7 @@ elif menu_navegacao == "📊 Meus Resultados":
                 else: cor_status = "#262730"
 
                 # --- CÁLCULO MATEMÁTICO DA TRILHA ---
-                try:
-                    pontuacao_val = float(pontuacao_final_str.replace("%", "").replace(",", ".").strip())
-                except:
-                    pontuacao_val = 0.0
+                pontuacao_val = registro["pontuacao"]
 
                 escala_max = 135.0 # Respiro no final
                 pos_user = min(100.0, (pontuacao_val / escala_max) * 100.0)
@@ -885,14 +996,9 @@ elif menu_navegacao == "📊 Meus Resultados":
                 st.markdown(hero_banner, unsafe_allow_html=True)
                                 
                 # --- B) MOTOR INTELIGENTE DOS SMART CARDS ---
-                def draw_smart_card(titulo, real_str, meta_str, ating_str):
-                    def limpar_num(texto):
-                        try: return float(str(texto).replace("%", "").replace(",", ".").strip())
-                        except: return 0.0
-                    
-                    real_val = limpar_num(real_str)
-                    meta_val = limpar_num(meta_str)
-                    ating_val = limpar_num(ating_str)
+                def draw_smart_card(metrica):
+                    titulo, real_str, meta_str, ating_str = metrica["nome"], metrica["real_str"], metrica["meta_str"], metrica["ating_str"]
+                    real_val, meta_val, ating_val = metrica["real"], metrica["meta"], metrica["atingimento"]
 
                     if ating_val >= 130: cor_barra, tag_nivel = "#d100d1", "👑 SUPER TURBO"
                     elif ating_val >= 110: cor_barra, tag_nivel = "#1e3a8a", "🚀 TURBO"
@@ -935,9 +1041,9 @@ elif menu_navegacao == "📊 Meus Resultados":
 </div>"""
                 
                 c1, c2, c3, c4 = st.columns(4)
-                with c1: st.markdown(draw_smart_card(metrica_1_nome, metrica_1_val, meta_1_val, ating_1_val), unsafe_allow_html=True)
-                with c2: st.markdown(draw_smart_card(metrica_2_nome, metrica_2_val, meta_2_val, ating_2_val), unsafe_allow_html=True)
-                with c3: st.markdown(draw_smart_card(metrica_3_nome, metrica_3_val, meta_3_val, ating_3_val), unsafe_allow_html=True)
+                with c1: st.markdown(draw_smart_card(metrica_1), unsafe_allow_html=True)
+                with c2: st.markdown(draw_smart_card(metrica_2), unsafe_allow_html=True)
+                with c3: st.markdown(draw_smart_card(metrica_3), unsafe_allow_html=True)
                 
                 card_qualidade = f"""<div style="background-color: #1c1e24; padding: 20px; border-radius: 8px; border: 1px solid #333; height: 100%; box-shadow: 0 4px 6px rgba(0,0,0,0.15); display: flex; flex-direction: column; justify-content: center;">
 <div style="font-size: 11px; color: #999; margin-bottom: 5px; font-weight: bold; text-transform: uppercase; letter-spacing: 0.5px;">QUALIDADE MENSAL</div>
@@ -956,3 +1062,6 @@ elif menu_navegacao == "📊 Meus Resultados":
             st.error("Não foi possível carregar a estrutura de indicadores neste momento.")
     else:
         st.error("Serviço de métricas temporariamente indisponível.")
+
+registrar_primeira_tela()
+registrar_execucao()
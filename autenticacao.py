@@ -0,0 +1,198 @@
+"""Tokens de sessão assinados (HMAC) e verificação de senha fora da thread do script."""
+import base64
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+import bcrypt
+
+VALIDADE_TOKEN = 24 * 3600  # igual à validade do cookie turbi_token
+
+
+# ==========================================
+# TOKENS DE SESSÃO (COOKIE turbi_token)
+# ==========================================
+def derivar_segredo(base, contexto="turbi-sessao"):
+    """Chave HMAC estável entre processos a partir de um segredo já configurado."""
+    return hmac.new(str(base).encode("utf-8"), contexto.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _assinatura(segredo, corpo):
+    digest = hmac.new(segredo, corpo.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def assinar_token(email, segredo, validade=VALIDADE_TOKEN, agora=None):
+    """ "email|expira_em|assinatura" : quem não tem o segredo não forja nem estende."""
+    expira_em = int((agora or time.time()) + validade)
+    corpo = f"{email}|{expira_em}"
+    return f"{corpo}|{_assinatura(segredo, corpo)}"
+
+
+def verificar_token(token, segredo, agora=None):
+    """E-mail do token se a assinatura bate e não expirou; senão None (só HMAC, microssegundos)."""
+    try:
+        email, expira_em, assinatura = str(token).rsplit("|", 2)
+        expira_em = int(expira_em)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(assinatura, _assinatura(segredo, f"{email}|{expira_em}")):
+        return None
+    if expira_em < (agora or time.time()):
+        return None
+    return email
+
+
+# ==========================================
+# LIMITE DE TENTATIVAS POR USUÁRIO
+# ==========================================
+class LimitadorTentativas:
+    """No máximo max_tentativas de login por usuário dentro da janela (segundos)."""
+
+    def __init__(self, max_tentativas=5, janela=300):
+        self.max_tentativas = max_tentativas
+        self.janela = janela
+        self._tentativas = {}  # {usuario: deque de instantes}
+        self._lock = threading.Lock()
+
+    def _recentes(self, usuario, agora):
+        fila = self._tentativas.get(usuario)
+        if fila is None:
+            return None
+        while fila and fila[0] <= agora - self.janela:
+            fila.popleft()
+        if not fila:
+            del self._tentativas[usuario]
+            return None
+        return fila
+
+    def permitir(self, usuario):
+        """Registra a tentativa; False se o usuário estourou o limite da janela."""
+        agora = time.time()
+        with self._lock:
+            fila = self._recentes(usuario, agora)
+            if fila is not None and len(fila) >= self.max_tentativas:
+                return False
+            self._tentativas.setdefault(usuario, deque()).append(agora)
+            return True
+
+    def limpar(self, usuario):
+        """Login certo zera o histórico do usuário."""
+        with self._lock:
+            self._tentativas.pop(usuario, None)
+
+
+# ==========================================
+# VERIFICAÇÃO DE SENHA EM POOL LIMITADO
+# ==========================================
+def senha_confere(senha_digitada, senha_guardada):
+    """bcrypt quando a senha guardada é um hash; senão comparação em tempo constante."""
+    guardada = str(senha_guardada).encode("utf-8")
+    digitada = str(senha_digitada).encode("utf-8")
+    if guardada.startswith((b"$2a$", b"$2b$", b"$2y$")):
+        try:
+            return bcrypt.checkpw(digitada, guardada)
+        except ValueError:
+            return False
+    # Legado: credenciais ainda em texto puro nos secrets
+    return hmac.compare_digest(digitada, guardada)
+
+
+class VerificadorSenhas:
+    """Pool fixo para o bcrypt: num pico de logins, no máximo max_workers hashes rodam
+    ao mesmo tempo e a fila é limitada; sessões já logadas seguem com CPU livre."""
+
+    OK = "ok"
+    SENHA_INVALIDA = "senha_invalida"
+    LIMITE = "limite"
+    OCUPADO = "ocupado"
+
+    def __init__(self, max_workers=2, max_fila=32, limitador=None, timeout=10):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="escala-bcrypt")
+        self.limitador = limitador or LimitadorTentativas()
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max_workers + max_fila)
+        self.contadores = {r: 0 for r in (self.OK, self.SENHA_INVALIDA, self.LIMITE, self.OCUPADO)}
+        self._lock = threading.Lock()
+
+    def _contar(self, resultado):
+        with self._lock:
+            self.contadores[resultado] += 1
+        return resultado
+
+    def _executar(self, senha_digitada, senha_guardada):
+        try:
+            return senha_confere(senha_digitada, senha_guardada)
+        finally:
+            self._vagas.release()
+
+    def verificar(self, usuario, senha_digitada, senha_guardada):
+        """OK / SENHA_INVALIDA / LIMITE (muitas tentativas) / OCUPADO (fila cheia)."""
+        if not self.limitador.permitir(usuario):
+            return self._contar(self.LIMITE)
+        if not self._vagas.acquire(blocking=False):
+            return self._contar(self.OCUPADO)
+        futuro = self.executor.submit(self._executar, senha_digitada, senha_guardada)
+        try:
+            confere = futuro.result(timeout=self.timeout)
+        except TempoEsgotado:
+            return self._contar(self.OCUPADO)
+        if not confere:
+            return self._contar(self.SENHA_INVALIDA)
+        self.limitador.limpar(usuario)
+        return self._contar(self.OK)
+
+
+# ==========================================
+# SESSÃO ÚNICA POR USUÁRIO
+# ==========================================
+class RegistroSessoes:
+    """e-mail -> sessão dona da conta, limitado em quantidade e com expiração por inatividade.
+
+    Entradas ficam em ordem de último acesso: a mais antiga sai primeiro quando
+    passa de max_itens, e qualquer uma parada há mais de ttl segundos expira.
+    """
+
+    def __init__(self, max_itens=5000, ttl=6 * 3600):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._sessoes = OrderedDict()  # {email: (session_id, visto_em)}
+        self._lock = threading.Lock()
+
+    def _expirar(self, agora):
+        while self._sessoes:
+            email, (_, visto_em) = next(iter(self._sessoes.items()))
+            if visto_em > agora - self.ttl and len(self._sessoes) <= self.max_itens:
+                break
+            del self._sessoes[email]
+
+    def _gravar(self, email, session_id, agora):
+        self._sessoes[email] = (session_id, agora)
+        self._sessoes.move_to_end(email)
+        self._expirar(agora)
+
+    def reivindicar(self, email, session_id):
+        """Login novo: esta sessão passa a ser a dona da conta (derruba a anterior)."""
+        with self._lock:
+            self._gravar(email, session_id, time.time())
+
+    def confirmar(self, email, session_id):
+        """Checa e renova numa operação só. False se outra sessão assumiu a conta;
+        sem registro (expirou/saiu pelo limite) a sessão atual reassume."""
+        agora = time.time()
+        with self._lock:
+            atual = self._sessoes.get(email)
+            if atual is not None and atual[1] > agora - self.ttl and atual[0] != session_id:
+                return False
+            self._gravar(email, session_id, agora)
+            return True
+
+    def ativas(self):
+        """Quantas contas têm sessão viva (acesso dentro do TTL)."""
+        with self._lock:
+            self._expirar(time.time())
+            return len(self._sessoes)
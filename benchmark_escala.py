@@ -0,0 +1,138 @@
+"""Benchmark offline do pipeline (parse, KPIs, filtros, HTML) sobre escalas sintéticas.
+
+Uso:
+    python benchmark_escala.py                          # 100 / 1.000 / 10.000 agentes
+    python benchmark_escala.py --agentes 1000 --repeticoes 5 --saida base.json
+    python benchmark_escala.py --comparar base.json     # sai com código 1 se alguma etapa regrediu
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from dataset_escala import DatasetEscala, codificar_aba, parse_aba
+from dimensionamento import SLA_ALVO_PADRAO, agentes_necessarios, curva_nivel_servico, ler_previsao
+from gerador_escala import NOMES_MESES, gerar_arquivos, gerar_previsao
+from kpis_escala import (MatrizAtividadesDim, MatrizKpiMensal, calcular_picos_vales_mensal,
+                         calcular_resumo_dia_dim, filtrar_e_ordenar_dim)
+from snapshot_gist import SnapshotGist
+from tabela_html import renderizar_tabela_html
+
+AGENTES_PADRAO = [100, 1000, 10000]
+LINHAS_JANELA = 60  # igual ao LINHAS_POR_JANELA do app
+
+
+def medir(funcao, repeticoes):
+    """(mediana_s, mínimo_s, pico_bytes). O pico vem de uma execução separada com tracemalloc."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(tempos), min(tempos), pico
+
+
+def etapas(n_agentes, mes=10):
+    """[(nome, função)] sobre uma escala sintética de n_agentes."""
+    arquivos = gerar_arquivos(n_agentes, mes=mes)
+    escala = json.loads(arquivos["escala_cx.json"])
+    bruta_mes = escala["Meses"][NOMES_MESES[mes - 1]]
+    nome_dim = sorted(escala["DIMs"])[0]
+    bruta_dim = escala["DIMs"][nome_dim]
+
+    df_mes = codificar_aba(parse_aba(bruta_mes))
+    df_dim = codificar_aba(parse_aba(bruta_dim))
+    matriz_dim = MatrizAtividadesDim(df_dim)
+    dia = next(c for c in df_mes.columns if "/" in c)
+    cols_mes = [c for c in df_mes.columns if c.upper().strip() not in ["EMAIL", "E-MAIL", "ADMISSAO", "ILHA", "Z"]]
+    cols_dim = [c for c in df_dim.columns if c.upper().strip() not in ["EMAIL", "E-MAIL", "ILHA", "Z"]]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_previsao = os.path.join(pasta, "previsao_volume.csv")
+        with open(caminho_previsao, "w", encoding="utf-8") as f:
+            f.write(gerar_previsao(n_agentes, mes=mes))
+        _, volume, tma = next(iter(ler_previsao(caminho_previsao).values()))
+    curva = curva_nivel_servico(volume, tma, 20)
+    alvos = np.linspace(0.5, 0.99, 50)
+
+    return [
+        ("json_decode", lambda: json.loads(arquivos["escala_cx.json"])),
+        ("parse_aba_mes", lambda: parse_aba(bruta_mes)),
+        ("parse_aba_dim", lambda: parse_aba(bruta_dim)),
+        ("codificar_aba_mes", lambda: codificar_aba(parse_aba(bruta_mes))),
+        ("picos_vales_mensal", lambda: calcular_picos_vales_mensal(df_mes)),
+        ("kpis_mensal_consulta", lambda: MatrizKpiMensal(df_mes).kpis(dia)),
+        ("resumo_dia_dim", lambda: calcular_resumo_dia_dim(df_dim)),
+        ("resumo_dia_dim_matriz", lambda: matriz_dim.resumo()),
+        ("filtrar_ordenar_dim", lambda: filtrar_e_ordenar_dim(df_dim, "💬 Apenas Chat")),
+        ("filtrar_ordenar_dim_matriz", lambda: filtrar_e_ordenar_dim(df_dim, "💬 Apenas Chat", matriz_dim)),
+        ("html_mes_completo", lambda: renderizar_tabela_html(df_mes[cols_mes], "mensal", "height-mensal")),
+        ("html_mes_janela", lambda: renderizar_tabela_html(df_mes[cols_mes].iloc[:LINHAS_JANELA], "mensal", "height-mensal")),
+        ("html_dim_completo", lambda: renderizar_tabela_html(df_dim[cols_dim], "diario", "height-diaria")),
+        ("erlang_curva_dia", lambda: curva_nivel_servico(volume, tma, 20)),
+        ("erlang_varrer_50_slas", lambda: [agentes_necessarios(curva, volume, alvo) for alvo in alvos]),
+        ("erlang_necessarios_padrao", lambda: agentes_necessarios(curva, volume, SLA_ALVO_PADRAO)),
+        ("dataset_completo", lambda: DatasetEscala(SnapshotGist(None, dict(arquivos)))),
+    ]
+
+
+def rodar(lista_agentes, repeticoes):
+    resultados = {}
+    for n_agentes in lista_agentes:
+        for nome, funcao in etapas(n_agentes):
+            mediana, minimo, pico = medir(funcao, repeticoes)
+            resultados[f"{nome}@{n_agentes}"] = {"mediana_s": mediana, "minimo_s": minimo, "pico_bytes": pico}
+            print(f"{n_agentes:>6} agentes  {nome:<28} {mediana * 1000:>10.2f} ms  (mín {minimo * 1000:.2f})  pico {pico / 1e6:>8.2f} MB")
+    return resultados
+
+
+def comparar(resultados, base, tolerancia):
+    """Etapas mais lentas que a base além da tolerância (ex.: 0.25 = 25%)."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        anterior = base.get(chave)
+        if anterior and atual["mediana_s"] > anterior["mediana_s"] * (1 + tolerancia):
+            regressoes.append((chave, anterior["mediana_s"], atual["mediana_s"]))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agentes", type=int, nargs="+", default=AGENTES_PADRAO)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", help="grava os resultados em JSON (serve de base para --comparar)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    resultados = rodar(args.agentes, args.repeticoes)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        for chave, antes, depois in regressoes:
+            print(f"REGRESSÃO {chave}: {antes * 1000:.2f} ms -> {depois * 1000:.2f} ms")
+        if regressoes:
+            return 1
+        print("Sem regressões acima da tolerância.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
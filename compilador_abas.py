@@ -0,0 +1,113 @@
+"""Abas da escala compiladas uma vez por conteúdo e guardadas em Arrow (Feather) mapeável em memória."""
+import json
+import os
+import threading
+import time
+
+import pyarrow.feather as feather
+
+from dataset_escala import codificar_aba, executar_em_paralelo, parse_aba
+from snapshot_gist import hash_trecho
+from telemetria import TELEMETRIA
+
+SUBPASTA_ABAS = "abas"
+SUFIXO_ARROW = ".arrow"
+SUFIXO_VAZIA = ".vazia"  # aba sem cabeçalho reconhecível: lembramos que o parse dá None
+IDADE_MAXIMA_ORFAOS = 24 * 3600
+# Formato do que parse_aba/codificar_aba produzem. Suba sempre que a saída mudar
+# (colunas, tipos, normalização): o mesmo conteúdo passa a compilar para outro arquivo.
+VERSAO_FORMATO = 1
+
+
+class CompiladorAbas:
+    """Compila cada aba (Mês/DIM) uma única vez por conteúdo e reaproveita entre processos."""
+
+    def __init__(self, pasta_cache):
+        self.pasta = os.path.join(pasta_cache, SUBPASTA_ABAS) if pasta_cache else None
+        self.contadores = {"compiladas": 0, "disco": 0}
+        self._lock_contadores = threading.Lock()
+
+    def _contar(self, chave):
+        with self._lock_contadores:
+            self.contadores[chave] += 1
+
+    def _caminho(self, hash_conteudo, sufixo):
+        return os.path.join(self.pasta, f"{hash_conteudo}.v{VERSAO_FORMATO}{sufixo}")
+
+    @TELEMETRIA.cronometrar("ler_aba_arrow")
+    def _ler(self, hash_conteudo):
+        """(encontrado, df) lendo do disco. memory_map evita copiar o arquivo para o heap."""
+        if self.pasta is None:
+            return False, None
+        if os.path.exists(self._caminho(hash_conteudo, SUFIXO_VAZIA)):
+            return True, None
+        caminho = self._caminho(hash_conteudo, SUFIXO_ARROW)
+        if not os.path.exists(caminho):
+            return False, None
+        try:
+            return True, feather.read_table(caminho, memory_map=True).to_pandas()
+        except Exception as e:
+            print(f"Erro ao ler aba compilada {caminho}: {e}")
+            return False, None
+
+    def _gravar(self, hash_conteudo, df):
+        if self.pasta is None:
+            return
+        try:
+            os.makedirs(self.pasta, exist_ok=True)
+            if df is None:
+                open(self._caminho(hash_conteudo, SUFIXO_VAZIA), "w").close()
+                return
+            destino = self._caminho(hash_conteudo, SUFIXO_ARROW)
+            temporario = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # Sem compressão: o arquivo fica mapeável direto do page cache
+            feather.write_feather(df, temporario, compression="uncompressed")
+            os.replace(temporario, destino)
+        except Exception as e:
+            # Ex.: cabeçalho com nomes repetidos. Segue só com a versão em memória.
+            print(f"Erro ao gravar aba compilada: {e}")
+
+    def compilar(self, trecho):
+        """DataFrame tipado da aba a partir do seu texto JSON (IndiceAbas.trecho).
+        Se esse conteúdo já foi compilado vem do disco e o JSON nem é decodificado."""
+        hash_conteudo = hash_trecho(trecho)
+        encontrado, df = self._ler(hash_conteudo)
+        if encontrado:
+            self._contar("disco")
+            return hash_conteudo, df
+
+        df = parse_aba(json.loads(trecho))
+        if df is not None:
+            # Índice 0..n igual ao que volta do Arrow, para a versão recém-compilada
+            # e a lida do disco se comportarem da mesma forma. Células como
+            # Categorical: no Arrow viram colunas de dicionário.
+            df = codificar_aba(df.reset_index(drop=True))
+        self._contar("compiladas")
+        self._gravar(hash_conteudo, df)
+        return hash_conteudo, df
+
+    def compilar_todas(self, abas, executor=None, manter=()):
+        """{nome: texto_json_da_aba} -> {nome: df}, uma tarefa por aba no pool se houver.
+        Limpa do disco compilações órfãs antigas (menos as de `manter`: abas reaproveitadas)."""
+        resultados = executar_em_paralelo(executor, {
+            nome: (lambda trecho=trecho: self.compilar(trecho)) for nome, trecho in abas.items()
+        })
+        self.limpar_orfaos({hash_conteudo for hash_conteudo, _ in resultados.values()} | set(manter))
+        return {nome: df for nome, (_, df) in resultados.items()}
+
+    def limpar_orfaos(self, vivos):
+        """Apaga compilações que não pertencem à versão atual (ou são de outro formato)
+        e já passaram de um dia."""
+        if self.pasta is None or not os.path.isdir(self.pasta):
+            return
+        limite = time.time() - IDADE_MAXIMA_ORFAOS
+        formato = f"v{VERSAO_FORMATO}"
+        for arquivo in os.listdir(self.pasta):
+            partes = arquivo.split(".")
+            viva = partes[0] in vivos and len(partes) > 2 and partes[1] == formato
+            caminho = os.path.join(self.pasta, arquivo)
+            try:
+                if not viva and os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
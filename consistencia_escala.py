@@ -0,0 +1,118 @@
+"""Conferência Mês x DIMs: o status do agente na aba mensal bate com a grade do dia?"""
+import numpy as np
+import pandas as pd
+
+from kpis_escala import TEM_ATIVIDADE, TEM_CHAT, codificar_status
+
+FOLGA_COM_CHAT = "Folga com CHAT na DIM"
+ESCALADO_SEM_HORARIO = "Escalado sem horários na DIM"
+AUSENTE_DA_DIM = "Ausente da DIM"
+PROBLEMAS = [FOLGA_COM_CHAT, ESCALADO_SEM_HORARIO, AUSENTE_DA_DIM]
+
+# Bits por agente x dia vindos das DIMs
+NA_DIM = 1
+COM_CHAT = 2
+COM_TRABALHO = 4
+
+COLUNAS_RELATORIO = ["Mês", "Dia", "Nome", "Líder", "Ilha", "Status no mês", "Problema"]
+
+
+def _nomes(df):
+    """NOME de cada linha, sem espaços nas pontas e sem distinção de caixa."""
+    if 'NOME' not in df.columns:
+        return np.full(len(df), '', dtype=object)
+    return df['NOME'].astype(str).str.strip().str.upper().to_numpy(dtype=object)
+
+
+class RelatorioConsistencia:
+    """Aba mensal cruzada com todas as DIMs dos seus dias numa passada só.
+
+    Nomes do mês e das DIMs viram um único código de agente; as DIMs enchem uma
+    matriz de bits agentes x dias (está na aba / tem CHAT / tem alguma atividade)
+    e o status do mês é comparado com ela de uma vez:
+      - F (folga) com CHAT no dia;
+      - T (escalado) sem nenhuma célula preenchida além de folga no dia
+        (RT, BACKOFFICE, REEMBOLSOS etc. contam como horário);
+      - T ou F sem linha na DIM do dia.
+    chave: hashes das abas usadas, para reaproveitar o relatório na próxima versão.
+    """
+
+    def __init__(self, mes, df_mes, dims, chave=None):
+        """dims: [(dia "dd/mm", df da DIM, MatrizAtividadesDim)] dos dias do mês que têm DIM."""
+        self.mes = mes
+        self.chave = chave
+        self.dias = [dia for dia, _, _ in dims]
+
+        nomes_mes = _nomes(df_mes)
+        nomes_dims = [_nomes(df) for _, df, _ in dims]
+        codigos, agentes = pd.factorize(np.concatenate([nomes_mes] + nomes_dims))
+        agente_mes = codigos[:len(nomes_mes)]
+
+        bits = np.zeros((len(agentes), len(dims)), dtype=np.uint8)
+        inicio = len(nomes_mes)
+        for d, ((_, _, matriz), nomes) in enumerate(zip(dims, nomes_dims)):
+            agente_dim = codigos[inicio:inicio + len(nomes)]
+            inicio += len(nomes)
+            linha = matriz.bits_linha
+            flags = (NA_DIM | np.where(linha & TEM_CHAT > 0, COM_CHAT, 0)
+                     | np.where(linha & TEM_ATIVIDADE > 0, COM_TRABALHO, 0)).astype(np.uint8)
+            validas = nomes != ''
+            # Nome repetido na DIM: vale a união das linhas
+            np.bitwise_or.at(bits[:, d], agente_dim[validas], flags[validas])
+
+        if dims:
+            status, vocab = codificar_status(df_mes, self.dias)
+        else:
+            status, vocab = np.zeros((len(df_mes), 0), dtype=np.int64), []
+        cod_f = vocab.index('F') if 'F' in vocab else -1
+        cod_t = vocab.index('T') if 'T' in vocab else -1
+
+        tem_nome = (nomes_mes != '')[:, None]
+        do_mes = bits[agente_mes]  # linhas do mês x dias
+        eh_f, eh_t = (status == cod_f) & tem_nome, (status == cod_t) & tem_nome
+        na_dim = do_mes & NA_DIM > 0
+        problemas = {
+            FOLGA_COM_CHAT: eh_f & (do_mes & COM_CHAT > 0),
+            ESCALADO_SEM_HORARIO: eh_t & na_dim & (do_mes & COM_TRABALHO == 0),
+            AUSENTE_DA_DIM: (eh_f | eh_t) & ~na_dim,
+        }
+
+        def coluna(nome):
+            return df_mes[nome].astype(str).to_numpy(dtype=object) if nome in df_mes.columns else np.full(len(df_mes), '', dtype=object)
+
+        nome_original, lider, ilha = coluna('NOME'), coluna('LIDER'), coluna('ILHA')
+        rotulos_status = np.array([str(v) for v in vocab] or [''], dtype=object)
+        partes = []
+        linhas_mes = []
+        for problema, mascara in problemas.items():
+            linhas, dias = np.nonzero(mascara)
+            linhas_mes.append(linhas)
+            partes.append(pd.DataFrame({
+                "Mês": mes,
+                "Dia": np.array(self.dias, dtype=object)[dias] if len(dias) else np.array([], dtype=object),
+                "Nome": nome_original[linhas], "Líder": lider[linhas], "Ilha": ilha[linhas],
+                "Status no mês": rotulos_status[status[linhas, dias]] if len(linhas) else np.array([], dtype=object),
+                "Problema": problema,
+            }, columns=COLUNAS_RELATORIO))
+        divergencias = pd.concat(partes, ignore_index=True)
+        ordem_dia = {dia: i for i, dia in enumerate(self.dias)}
+        divergencias = divergencias.sort_values(
+            ["Dia", "Problema", "Nome"], key=lambda s: s.map(ordem_dia) if s.name == "Dia" else s)
+        # Linha da aba mensal de cada divergência: os filtros usam o IndiceFiltros do mês
+        self.linhas_mes = np.concatenate(linhas_mes)[divergencias.index.to_numpy()]
+        self.divergencias = divergencias.reset_index(drop=True)
+
+    def filtrar(self, posicoes=None, problemas=None):
+        """Divergências das linhas do mês em `posicoes` (IndiceFiltros.posicoes da aba
+        mensal; None = todas) e, se pedido, só dos tipos de problema escolhidos."""
+        mascara = np.ones(len(self.divergencias), dtype=bool)
+        if posicoes is not None:
+            mascara &= np.isin(self.linhas_mes, posicoes)
+        if problemas:
+            mascara &= self.divergencias["Problema"].isin(problemas).to_numpy()
+        return self.divergencias if mascara.all() else self.divergencias[mascara]
+
+
+def relatorio_csv(divergencias):
+    """Divergências em CSV (";" e UTF-8 com BOM: abre direto no Excel)."""
+    return divergencias.to_csv(index=False, sep=";").encode("utf-8-sig")
@@ -0,0 +1,602 @@
+"""Dataset da escala: leitura das abas do Gist e troca atômica de versões em background."""
+import bisect
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from consistencia_escala import RelatorioConsistencia
+from kpis_escala import CuboAtividadesDim, MatrizAtividadesDim, MatrizKpiMensal
+from resultados_cx import IndiceMetricas
+from telemetria import TELEMETRIA
+
+# pandas 2.x: recortes (iloc, colunas) viram views preguiçosas em vez de cópias.
+# No pandas 3 o Copy-on-Write já é o padrão.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Linhas que separam blocos da escala e não podem ser apagadas no filtro de ILHA
+LISTA_SEPARADORES = ['FINANCEIRO', 'E-MAIL', 'ASSÍNCRONO', 'ASSINCRONO', 'FINANCEIRO ASSÍNCRONO', 'PLENO', 'STAFF', 'N2']
+
+
+def normalizar_texto(texto):
+    """Remove acentos e deixa maiúsculo (ex: LÍDER -> LIDER)"""
+    return ''.join(c for c in unicodedata.normalize('NFD', str(texto))
+                  if unicodedata.category(c) != 'Mn').upper().strip()
+
+
+@TELEMETRIA.cronometrar("parse_aba")
+def parse_aba(dados):
+    """Transforma a matriz bruta de uma aba (Mês ou DIM) em DataFrame limpo."""
+    if not dados:
+        return None
+
+    try:
+        # 1. Localizar Cabeçalho
+        indice_cabecalho = -1
+        cabecalho_bruto = []
+
+        for i, linha in enumerate(dados[:15]):
+            linha_norm = [normalizar_texto(col) for col in linha]
+
+            tem_nome = "NOME" in linha_norm or "NOMES" in linha_norm
+            tem_lider = "LIDER" in linha_norm
+            tem_horario = any("HORARIO" in col for col in linha_norm)
+
+            if tem_nome and (tem_lider or tem_horario):
+                indice_cabecalho = i
+                cabecalho_bruto = linha
+                break
+
+        if indice_cabecalho == -1: return None
+
+        # 2. Tratamento do Cabeçalho
+        cabecalho_tratado = []
+        contagem_cols = {}
+        for col in cabecalho_bruto:
+            col_str = normalizar_texto(col)
+            if col_str == "NOMES": col_str = "NOME"
+
+            if col_str in contagem_cols:
+                contagem_cols[col_str] += 1
+                cabecalho_tratado.append(f"{col_str} ")
+            else:
+                if col_str != "": contagem_cols[col_str] = 1
+                cabecalho_tratado.append(col_str)
+
+        linhas = dados[indice_cabecalho + 1:]
+        df = pd.DataFrame(linhas, columns=cabecalho_tratado)
+        df = df.loc[:, df.columns != '']
+
+        # 3. FILTRAGEM
+        if 'NOME' in df.columns:
+            df = df[df['NOME'].astype(str).str.strip() != '']
+
+        if 'ILHA' in df.columns:
+            # Condição 1: A ilha não é vazia
+            mask_ilha_preenchida = df['ILHA'].astype(str).str.strip() != ''
+            # Condição 2: O nome é um dos nossos separadores VIP
+            mask_eh_separador = df['NOME'].astype(str).str.upper().str.strip().isin(LISTA_SEPARADORES)
+
+            # Mantém a linha se ela passar na Condição 1 OU na Condição 2
+            df = df[mask_ilha_preenchida | mask_eh_separador]
+
+        # 4. LIMPEZA DE DADOS
+        for col in df.columns:
+            if df[col].dtype == 'object':
+                df[col] = df[col].astype(str).str.strip()
+
+        if len(df.columns) > 35:
+            df = df.iloc[:, :40]
+
+        return df
+
+    except Exception as e:
+        print(f"Erro: {e}")
+        return None
+
+
+def executar_em_paralelo(executor, tarefas):
+    """{chave: função sem argumentos} -> {chave: resultado}; no pool se houver um."""
+    if executor is None:
+        return {chave: funcao() for chave, funcao in tarefas.items()}
+    futuros = {chave: executor.submit(funcao) for chave, funcao in tarefas.items()}
+    return {chave: futuro.result() for chave, futuro in futuros.items()}
+
+
+def eh_coluna_escala(coluna):
+    """Colunas de data (Mês: "17/10") ou de horário (DIM: "14:00")."""
+    return '/' in str(coluna) or ':' in str(coluna)
+
+
+def vocabulario_escala(abas):
+    """Vocabulário comum das células de escala de todas as abas (poucas dezenas de valores)."""
+    valores = set()
+    for df in abas.values():
+        if df is None: continue
+        for i, coluna in enumerate(df.columns):
+            if eh_coluna_escala(coluna):
+                serie = df.iloc[:, i]
+                if isinstance(serie.dtype, pd.CategoricalDtype):
+                    # Só as categorias em uso: uma aba reaproveitada traz o vocabulário antigo inteiro
+                    codigos = np.unique(serie.cat.codes.to_numpy())
+                    valores.update(serie.cat.categories[codigos[codigos >= 0]])
+                else:
+                    valores.update(serie.dropna().unique())
+    return sorted(valores, key=str)
+
+
+def codificar_aba(df, vocabulario=None):
+    """Células da escala como Categorical (códigos int8 com o vocabulário comum)
+    e LIDER/ILHA como Categorical. Sem vocabulário, cada coluna usa o seu."""
+    if df is None: return None
+    tipo_celula = pd.CategoricalDtype(vocabulario) if vocabulario is not None else 'category'
+    df = df.copy(deep=False)
+    for i, coluna in enumerate(df.columns):
+        if eh_coluna_escala(coluna):
+            df.isetitem(i, df.iloc[:, i].astype(tipo_celula))
+        elif coluna in ('LIDER', 'ILHA'):
+            df.isetitem(i, df.iloc[:, i].astype('category'))
+    return df
+
+
+def parse_pessoas(dados):
+    """Lista de líderes e ilhas a partir da aba Pessoas."""
+    if not dados: return [], []
+
+    try:
+        df = pd.DataFrame(dados)
+        df.columns = [str(c).upper().strip() for c in df.columns]
+
+        lideres = []
+        ilhas = []
+
+        col_lider = next((c for c in df.columns if 'LIDER' in c), None)
+        if col_lider:
+            lideres = sorted([str(x).strip() for x in df[col_lider].unique() if str(x).strip() != ''])
+
+        col_ilha = next((c for c in df.columns if 'ILHA' in c), None)
+        if col_ilha:
+            ilhas = sorted([str(x).strip() for x in df[col_ilha].unique() if str(x).strip() != ''])
+
+        return lideres, ilhas
+    except Exception as e:
+        print(f"Erro ao ler Pessoas: {e}")
+        return [], []
+
+
+class IndiceFiltros:
+    """Índices invertidos de uma aba para os filtros da sidebar.
+
+    LIDER/ILHA -> posições das linhas, e um índice de sufixos dos nomes sem
+    acento: busca por prefixo ou trecho (literal, não regex) vira busca binária.
+    """
+
+    def __init__(self, df):
+        self.n_linhas = len(df)
+        self.por_lider = self._agrupar(df, 'LIDER')
+        self.por_ilha = self._agrupar(df, 'ILHA')
+        self.tem_nome = 'NOME' in df.columns
+
+        sufixos = []
+        if self.tem_nome:
+            for pos, nome in enumerate(df['NOME']):
+                nome_norm = normalizar_texto(nome)
+                for inicio in range(len(nome_norm)):
+                    sufixos.append((nome_norm[inicio:], inicio, pos))
+        sufixos.sort()
+        self._sufixos = [s for s, _, _ in sufixos]
+        self._inicios = np.array([i for _, i, _ in sufixos], dtype=np.int32)
+        self._posicoes_sufixo = np.array([p for _, _, p in sufixos], dtype=np.int64)
+
+    @staticmethod
+    def _agrupar(df, coluna):
+        if coluna not in df.columns:
+            return None
+        grupos = df.groupby(coluna, sort=False, observed=True).indices
+        return {valor: np.asarray(pos) for valor, pos in grupos.items()}
+
+    def buscar_nome(self, texto, apenas_prefixo=False):
+        """Posições (ordenadas) cujo nome contém o texto, ignorando acento e caixa."""
+        termo = normalizar_texto(texto)
+        i = bisect.bisect_left(self._sufixos, termo)
+        j = bisect.bisect_left(self._sufixos, termo + "\uffff", lo=i)
+        posicoes = self._posicoes_sufixo[i:j]
+        if apenas_prefixo:
+            posicoes = posicoes[self._inicios[i:j] == 0]
+        return np.unique(posicoes)
+
+    @staticmethod
+    def _uniao(indice, valores):
+        partes = [indice[v] for v in valores if v in indice]
+        return np.unique(np.concatenate(partes)) if partes else np.array([], dtype=np.int64)
+
+    def posicoes(self, lideres=None, ilhas=None, busca_nome=""):
+        """Interseção dos filtros ativos. None quando nenhum filtro se aplica (aba inteira)."""
+        conjuntos = []
+        if lideres and self.por_lider is not None:
+            conjuntos.append(self._uniao(self.por_lider, lideres))
+        if ilhas and self.por_ilha is not None:
+            conjuntos.append(self._uniao(self.por_ilha, ilhas))
+        if busca_nome and busca_nome.strip() and self.tem_nome:
+            conjuntos.append(self.buscar_nome(busca_nome))
+        if not conjuntos:
+            return None
+        resultado = conjuntos[0]
+        for outro in conjuntos[1:]:
+            resultado = np.intersect1d(resultado, outro, assume_unique=True)
+        return resultado
+
+    def filtrar(self, df, lideres=None, ilhas=None, busca_nome=""):
+        """Linhas de df que passam nos filtros, sem copiar a aba quando não há filtro."""
+        posicoes = self.posicoes(lideres, ilhas, busca_nome)
+        return df if posicoes is None else df.iloc[posicoes]
+
+
+# "DIM 01/10" -> "01/10": o dia (dd/mm) que cada aba diária cobre
+PADRAO_DIA_ABA = re.compile(r"\d{2}/\d{2}")
+MAX_CUBOS_PERIODO = 16  # períodos (conjuntos de DIMs) empilhados guardados por versão
+
+
+# Abas anuais de plantão: "ESCALA 26 STAFF", "ESCALA 27 STAFF", ...
+PADRAO_ABA_PLANTAO = re.compile(r"^ESCALA \d{2} STAFF$")
+
+
+class CalendarioPlantao:
+    """Plantões de todas as abas anuais indexados por data (lidos uma vez por versão)."""
+
+    def __init__(self, escala):
+        self._por_dia = {}
+        abas = sorted(nome for nome in escala if PADRAO_ABA_PLANTAO.match(str(nome).strip()))
+        for nome in abas:
+            dados = escala.get(nome) or []
+            if len(dados) < 3: continue
+            for linha in dados:
+                if len(linha) < 7: continue
+                try:
+                    dia = datetime.strptime(str(linha[1]).strip(), "%d/%m/%Y").date()
+                except ValueError:
+                    continue
+                staff = str(linha[2]).strip()
+                urgencia = str(linha[5]).strip()
+                telefone = str(linha[6]).strip()
+                # Como na busca linear antiga, vale a primeira linha preenchida da data
+                if (staff or urgencia) and dia not in self._por_dia:
+                    self._por_dia[dia] = {"staff": staff, "urgencia": urgencia, "telefone": telefone}
+        self._dias = sorted(self._por_dia)
+
+    def dia(self, data):
+        """Plantão de uma data (date ou "dd/mm/aaaa") em O(1)."""
+        if isinstance(data, str):
+            try:
+                data = datetime.strptime(data.strip(), "%d/%m/%Y").date()
+            except ValueError:
+                return None
+        return self._por_dia.get(data)
+
+    def intervalo(self, inicio, fim):
+        """[(data, plantão)] de inicio a fim (inclusive), por busca binária."""
+        i = bisect.bisect_left(self._dias, inicio)
+        j = bisect.bisect_right(self._dias, fim)
+        return [(d, self._por_dia[d]) for d in self._dias[i:j]]
+
+
+class DatasetEscala:
+    """Uma versão já processada do escala_cx.json. Nunca é alterada depois de pronta."""
+
+    def __init__(self, snapshot, compilador=None, executor=None, anterior=None):
+        """anterior: versão no ar. Abas com o mesmo hash de conteúdo são reaproveitadas
+        dela (DataFrame e estruturas derivadas) em vez de decodificadas de novo."""
+        self.snapshot = snapshot
+        self.versao = snapshot.versao
+
+        # A escala só é indexada (escala_cx.json inteiro ou manifesto + um arquivo por aba)
+        # enquanto as métricas são decodificadas; cada aba é decodificada sozinha, ao compilar.
+        arquivos = executar_em_paralelo(executor, {
+            "escala": lambda: snapshot.abas_escala(),
+            "metricas": lambda: self._ler_metricas(snapshot),
+        })
+        escala = arquivos["escala"]
+        self.metricas = arquivos["metricas"]
+
+        meses = escala.abas_do_grupo("Meses")
+        dims = escala.abas_do_grupo("DIMs")
+        self.abas_dim = sorted(dims)
+        # dd/mm -> aba DIM, vale a primeira em ordem (como a busca por texto antiga)
+        self.dim_por_dia = {}
+        for nome in self.abas_dim:
+            for dia in PADRAO_DIA_ABA.findall(nome):
+                self.dim_por_dia.setdefault(dia, nome)
+
+        # Mesma prioridade de antes: se o nome existir nos dois, vale o Mês
+        self.grupo_aba = {nome: "DIMs" for nome in dims}
+        self.grupo_aba.update({nome: "Meses" for nome in meses})
+        self.hashes = {nome: escala.hash(grupo, nome) for nome, grupo in self.grupo_aba.items()}
+
+        reaproveitadas = set()
+        if anterior is not None:
+            reaproveitadas = {
+                nome for nome, h in self.hashes.items()
+                if anterior.hashes.get(nome) == h and anterior.grupo_aba.get(nome) == self.grupo_aba[nome]
+            }
+        self.reaproveitadas = sorted(reaproveitadas)
+
+        brutas = {nome: escala.trecho(grupo, nome) for nome, grupo in self.grupo_aba.items() if nome not in reaproveitadas}
+        if compilador is not None:
+            manter = [self.hashes[nome] for nome in reaproveitadas]
+            self.abas = compilador.compilar_todas(brutas, executor, manter)
+        else:
+            self.abas = executar_em_paralelo(executor, {
+                nome: (lambda trecho=trecho: parse_aba(json.loads(trecho))) for nome, trecho in brutas.items()
+            })
+        del brutas
+        for nome in reaproveitadas:
+            self.abas[nome] = anterior.abas[nome]
+        self.abas = {nome: self.abas[nome] for nome in self.grupo_aba}
+
+        # Um único vocabulário para as células de todas as abas desta versão
+        # (as reaproveitadas só são recodificadas se ele mudou)
+        self.vocabulario = vocabulario_escala(self.abas)
+        self.abas = {
+            nome: df if nome in reaproveitadas and self.vocabulario == anterior.vocabulario else codificar_aba(df, self.vocabulario)
+            for nome, df in self.abas.items()
+        }
+        self._relatorio_memoria = None
+        self._cubos = OrderedDict()  # {tupla de abas DIM: CuboAtividadesDim}
+        self._lock_cubos = threading.Lock()
+
+        # Estruturas derivadas, uma tarefa por aba nova/alterada:
+        # cubo dia x status x ilha de cada Mês (os cards viram consultas),
+        # matriz de códigos de atividade de cada DIM (agentes x horários)
+        # e índices dos filtros de Líder / Ilha / Nome de todas as abas.
+        # Elas guardam contagens/códigos próprios, então as das abas
+        # reaproveitadas continuam valendo mesmo com o vocabulário novo.
+        validas = {nome: df for nome, df in self.abas.items() if df is not None}
+        tarefas = {}
+        for nome, df in validas.items():
+            tipo = "kpi" if nome in meses else "dim"
+            if nome in reaproveitadas:
+                anteriores = anterior.kpis_mensais if tipo == "kpi" else anterior.atividades_dim
+                tarefas[(tipo, nome)] = lambda nome=nome, anteriores=anteriores: anteriores[nome]
+                tarefas[("filtro", nome)] = lambda nome=nome: anterior.filtros[nome]
+                continue
+            estrutura = MatrizKpiMensal if tipo == "kpi" else MatrizAtividadesDim
+            tarefas[(tipo, nome)] = lambda df=df, estrutura=estrutura: estrutura(df)
+            tarefas[("filtro", nome)] = lambda df=df: IndiceFiltros(df)
+        tarefas[("pessoas", None)] = lambda: parse_pessoas(escala.valor("Pessoas", padrao=[]))
+        tarefas[("plantoes", None)] = lambda: CalendarioPlantao({
+            nome: escala.valor(nome) for nome in escala.chaves() if PADRAO_ABA_PLANTAO.match(str(nome).strip())
+        })
+        prontas = executar_em_paralelo(executor, tarefas)
+
+        def do_tipo(tipo):
+            return {nome: valor for (t, nome), valor in prontas.items() if t == tipo}
+
+        self.kpis_mensais = do_tipo("kpi")
+        self.atividades_dim = do_tipo("dim")
+        self.filtros = do_tipo("filtro")
+        self.lideres, self.ilhas = prontas[("pessoas", None)]
+        self.plantoes = prontas[("plantoes", None)]
+
+        # Conferência Mês x DIMs logo após a carga, uma tarefa por mês
+        # (reaproveitada se o mês e as DIMs dos seus dias não mudaram)
+        self.consistencia = executar_em_paralelo(executor, {
+            mes: (lambda mes=mes: self._conferir_mes(mes, anterior)) for mes in meses if self.kpis_mensais.get(mes) is not None
+        })
+
+        # Tudo o que as sessões precisam já está nas estruturas acima:
+        # o JSON decodificado não fica residente junto com elas.
+        snapshot.descartar_json()
+        self._congelar()
+
+    @TELEMETRIA.cronometrar("consistencia_mes")
+    def _conferir_mes(self, mes, anterior):
+        df_mes = self.abas[mes]
+        dims = [(dia, self.dim_por_dia[dia]) for dia in df_mes.columns
+                if '/' in dia and self.atividades_dim.get(self.dim_por_dia.get(dia)) is not None]
+        chave = (self.hashes[mes],) + tuple((dia, self.hashes[nome]) for dia, nome in dims)
+        relatorio_anterior = anterior.consistencia.get(mes) if anterior is not None else None
+        if relatorio_anterior is not None and relatorio_anterior.chave == chave:
+            return relatorio_anterior
+        return RelatorioConsistencia(mes, df_mes, [(dia, self.abas[nome], self.atividades_dim[nome]) for dia, nome in dims], chave)
+
+    @staticmethod
+    def _ler_metricas(snapshot):
+        # Métricas vêm de outro arquivo do Gist: se ele quebrar, a escala segue no ar
+        try:
+            return IndiceMetricas(snapshot.json("metricas_cx.json"))
+        except Exception as e:
+            print(f"Erro ao ler métricas: {e}")
+            return IndiceMetricas(None)
+
+    def _congelar(self):
+        """Marca as matrizes compartilhadas como somente leitura (escrita acidental vira erro)."""
+        estruturas = list(self.kpis_mensais.values()) + list(self.atividades_dim.values()) + list(self.filtros.values())
+        for estrutura in estruturas:
+            for valor in vars(estrutura).values():
+                arrays = valor.values() if isinstance(valor, dict) else [valor]
+                for arr in arrays:
+                    if isinstance(arr, np.ndarray):
+                        arr.setflags(write=False)
+
+    @property
+    def atualizado_em(self):
+        """Última vez em que o GitHub confirmou esta versão."""
+        return self.snapshot.verificado_em
+
+    def aba(self, nome_aba):
+        return self.abas.get(nome_aba)
+
+    def relatorio_memoria(self):
+        """Bytes das abas codificadas vs. as mesmas abas como texto (object), calculado uma vez."""
+        if self._relatorio_memoria is None:
+            codificado = texto = 0
+            for df in self.abas.values():
+                if df is None: continue
+                codificado += int(df.memory_usage(deep=True, index=False).sum())
+                texto += int(df.astype(object).memory_usage(deep=True, index=False).sum())
+            self._relatorio_memoria = {
+                "codificado_bytes": codificado,
+                "texto_bytes": texto,
+                "economia": 1 - codificado / texto if texto else 0.0,
+                "vocabulario": len(self.vocabulario),
+            }
+        return self._relatorio_memoria
+
+    def kpi_mensal(self, nome_aba):
+        return self.kpis_mensais.get(nome_aba)
+
+    def matriz_dim(self, nome_aba):
+        return self.atividades_dim.get(nome_aba)
+
+    @TELEMETRIA.cronometrar("filtrar_aba")
+    def filtrar_aba(self, nome_aba, lideres=None, ilhas=None, busca_nome=""):
+        df = self.abas.get(nome_aba)
+        if df is None: return None
+        return self.filtros[nome_aba].filtrar(df, lideres, ilhas, busca_nome)
+
+    def aba_dim_do_dia(self, data):
+        """Nome da aba DIM de uma data (ou None)."""
+        return self.dim_por_dia.get(data.strftime("%d/%m"))
+
+    def abas_dim_intervalo(self, inicio, fim):
+        """[(data, aba DIM)] de inicio a fim (inclusive), só os dias que têm DIM."""
+        dias = []
+        data = inicio
+        while data <= fim:
+            nome = self.aba_dim_do_dia(data)
+            if nome is not None and self.atividades_dim.get(nome) is not None:
+                dias.append((data, nome))
+            data += timedelta(days=1)
+        return dias
+
+    def cubo_dim(self, nomes_abas):
+        """DIMs empilhadas (dias x agentes x horários), montado uma vez por período nesta versão."""
+        chave = tuple(nomes_abas)
+        with self._lock_cubos:
+            cubo = self._cubos.get(chave)
+            if cubo is not None:
+                self._cubos.move_to_end(chave)
+                return cubo
+        with TELEMETRIA.medir("cubo_periodo"):
+            cubo = CuboAtividadesDim(chave, [self.abas[n] for n in chave], [self.atividades_dim[n] for n in chave])
+        for arr in [cubo.bits, cubo.chat, cubo.cobertura_total, *cubo.linhas]:
+            arr.setflags(write=False)
+        with self._lock_cubos:
+            cubo = self._cubos.setdefault(chave, cubo)
+            while len(self._cubos) > MAX_CUBOS_PERIODO:
+                self._cubos.popitem(last=False)
+        return cubo
+
+    def cobertura_chat_periodo(self, nomes_abas, lideres=None, ilhas=None, busca_nome=""):
+        """(cubo, agentes em CHAT por dia x horário) com os filtros da sidebar aplicados em cada DIM."""
+        cubo = self.cubo_dim(nomes_abas)
+        posicoes = [self.filtros[nome].posicoes(lideres, ilhas, busca_nome) for nome in cubo.dias]
+        return cubo, cubo.cobertura_chat(posicoes)
+
+    def consistencia_filtrada(self, mes, lideres=None, ilhas=None, busca_nome="", problemas=None):
+        """Divergências Mês x DIMs com os filtros da sidebar aplicados pelo índice da aba mensal
+        (mesma busca por nome, sem acento, das outras telas)."""
+        relatorio = self.consistencia.get(mes)
+        if relatorio is None: return None
+        return relatorio.filtrar(self.filtros[mes].posicoes(lideres, ilhas, busca_nome), problemas)
+
+    def plantao_dia(self, data):
+        return self.plantoes.dia(data)
+
+    def plantoes_intervalo(self, inicio, fim):
+        return self.plantoes.intervalo(inicio, fim)
+
+
+class AtualizadorDataset:
+    """Revalida o Gist numa thread própria e troca o dataset inteiro de uma vez.
+
+    Quem está navegando continua lendo a versão anterior até a nova ficar pronta,
+    então nenhuma sessão paga o download + parse no clique.
+    """
+
+    def __init__(self, armazem, intervalo=120, compilador=None, max_workers=None):
+        self.armazem = armazem
+        self.compilador = compilador
+        # Pool do processo para montar as abas e índices em paralelo (aquecimento e trocas)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(8, os.cpu_count() or 2), thread_name_prefix="escala-parse"
+        )
+        self.intervalo = intervalo
+        self.ultimo_erro = None
+        self.contadores = {"erros": 0}
+        self._dataset = None
+        self._lock_troca = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _montar(self, snapshot):
+        with TELEMETRIA.medir("montar_dataset"):
+            novo = DatasetEscala(snapshot, self.compilador, self.executor, anterior=self._dataset)
+        # Troca atômica: uma única atribuição de referência
+        self._dataset = novo
+        return novo
+
+    def atualizar(self):
+        """Um ciclo de revalidação. Só reprocessa se a versão do Gist mudou."""
+        try:
+            # Garante a cópia do disco carregada antes de ir à rede (o ETag dela vira If-None-Match).
+            # Se atual() acabou de baixar (partida a frio, sem disco), não pergunta de novo.
+            inicio_ciclo = time.time()
+            snapshot = self.armazem.atual()
+            if snapshot is None or snapshot.verificado_em < inicio_ciclo:
+                self.armazem.revalidar()
+            snapshot = self.armazem.atual()
+            with self._lock_troca:
+                if snapshot is not None and (self._dataset is None or self._dataset.versao != snapshot.versao):
+                    self._montar(snapshot)
+            self.ultimo_erro = self.armazem.ultimo_erro
+        except Exception as e:
+            # Mantém a versão antiga no ar
+            self._registrar_erro(e)
+
+    def _registrar_erro(self, e):
+        self.ultimo_erro = str(e)
+        self.contadores["erros"] += 1
+        print(f"Erro ao atualizar dataset: {e}")
+
+    def _loop(self):
+        while True:
+            self.atualizar()
+            if self._parar.wait(self.intervalo):
+                break
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="atualizador-escala", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        self.executor.shutdown(wait=False)
+
+    def atual(self):
+        """Dataset vigente. Só bloqueia no primeiro uso do processo, sem disco nem rede prévia."""
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+
+        with self._lock_troca:
+            if self._dataset is None:
+                # Gist com JSON quebrado: a tela mostra ultimo_erro em vez de um traceback
+                try:
+                    snapshot = self.armazem.atual()
+                    if snapshot is not None:
+                        self._montar(snapshot)
+                except Exception as e:
+                    self._registrar_erro(e)
+            return self._dataset
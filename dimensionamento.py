@@ -0,0 +1,230 @@
+"""Dimensionamento por intervalo (Erlang C) a partir da previsão de volume, e gap contra a DIM.
+
+Previsão: CSV ou JSON local com uma linha por intervalo:
+    data,horario,volume[,tma]
+    01/10/2026,09:00,420,380
+data em dd/mm/aaaa (ou aaaa-mm-dd), volume = contatos no intervalo, tma em segundos (opcional).
+Intervalos menores que 1h são somados na hora, igual às colunas da DIM. JSON: a mesma
+lista de registros, solta ou em {"intervalos": [...]}.
+"""
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from dataset_escala import normalizar_texto
+from kpis_escala import chave_horario
+from telemetria import TELEMETRIA
+
+SEGUNDOS_INTERVALO = 3600  # a DIM é por hora
+TMA_PADRAO = 300  # segundos, quando a previsão não traz tma
+TEMPO_ALVO_PADRAO = 20  # segundos (ex.: 80% atendidos em 20s)
+SLA_ALVO_PADRAO = 0.8
+MAX_CURVAS = 64  # curvas (dia x tma x tempo alvo) guardadas
+
+COLUNAS_PREVISAO = {
+    "data": ["DATA", "DIA"],
+    "horario": ["HORARIO", "HORA", "INTERVALO"],
+    "volume": ["VOLUME", "CONTATOS", "CHATS"],
+    "tma": ["TMA", "AHT"],
+}
+
+
+# ==========================================
+# ERLANG C VETORIZADO
+# ==========================================
+def probabilidade_espera(trafego, n_max):
+    """Erlang C de cada intervalo para N = 1..n_max agentes: matriz intervalos x n_max.
+
+    Recorrência de Erlang B (estável mesmo com tráfego alto), uma passada por N e
+    vetorizada entre os intervalos. Com N <= tráfego a fila não fecha: probabilidade 1.
+    """
+    trafego = np.asarray(trafego, dtype=float)
+    erlang_b = np.ones(len(trafego))
+    b_por_n = np.empty((len(trafego), n_max))
+    for n in range(1, n_max + 1):
+        erlang_b = trafego * erlang_b / (n + trafego * erlang_b)
+        b_por_n[:, n - 1] = erlang_b
+
+    agentes = np.arange(1, n_max + 1)[None, :]
+    carga = trafego[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        erlang_c = agentes * b_por_n / (agentes - carga * (1 - b_por_n))
+    return np.where(agentes > carga, erlang_c, 1.0)
+
+
+def curva_nivel_servico(volume, tma, tempo_alvo, segundos_intervalo=SEGUNDOS_INTERVALO):
+    """Nível de serviço (fração atendida até tempo_alvo) para N = 1..n_max: intervalos x n_max.
+
+    n_max cobre com folga o pico do dia, então qualquer SLA alvo vira só uma busca na curva.
+    """
+    volume = np.asarray(volume, dtype=float)
+    tma = np.asarray(tma, dtype=float)
+    trafego = volume * tma / segundos_intervalo
+    pico = float(trafego.max()) if len(trafego) else 0.0
+    n_max = max(1, int(math.ceil(pico + 6 * math.sqrt(pico) + 10)))
+
+    espera = probabilidade_espera(trafego, n_max)
+    agentes = np.arange(1, n_max + 1)[None, :]
+    folga = np.maximum(agentes - trafego[:, None], 0)
+    nivel = 1 - espera * np.exp(-folga * tempo_alvo / np.maximum(tma, 1)[:, None])
+    # Intervalo sem contato está sempre atendido
+    nivel[volume <= 0] = 1.0
+    return nivel
+
+
+def agentes_necessarios(curva, volume, sla_alvo):
+    """Menor N com nível >= sla_alvo em cada intervalo (0 sem volume; n_max se nem ele basta)."""
+    atinge = curva >= sla_alvo
+    necessarios = np.where(atinge.any(axis=1), atinge.argmax(axis=1) + 1, curva.shape[1])
+    return np.where(np.asarray(volume) > 0, necessarios, 0)
+
+
+def nivel_com_agentes(curva, agentes):
+    """Nível de serviço projetado com `agentes` escalados em cada intervalo."""
+    agentes = np.clip(np.asarray(agentes, dtype=np.int64), 0, curva.shape[1])
+    nivel = curva[np.arange(len(curva)), np.maximum(agentes - 1, 0)]
+    return np.where(agentes > 0, nivel, np.where(curva[:, 0] >= 1.0, 1.0, 0.0))
+
+
+# ==========================================
+# PREVISÃO DE VOLUME
+# ==========================================
+def _ler_data(texto):
+    texto = str(texto).strip()[:10]
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def ler_previsao(caminho):
+    """{data: (horarios, volume, tma)} do arquivo, já agregado por hora."""
+    if caminho.lower().endswith(".json"):
+        with open(caminho, encoding="utf-8") as f:
+            dados = json.load(f)
+        df = pd.DataFrame(dados.get("intervalos", []) if isinstance(dados, dict) else dados)
+    else:
+        df = pd.read_csv(caminho, sep=None, engine="python", dtype=str)
+
+    colunas = {}
+    for coluna in df.columns:
+        nome = normalizar_texto(coluna)
+        for campo, aliases in COLUNAS_PREVISAO.items():
+            if nome in aliases and campo not in colunas:
+                colunas[campo] = coluna
+    if not {"data", "horario", "volume"} <= set(colunas):
+        raise ValueError(f"Previsão sem as colunas data/horario/volume: {list(df.columns)}")
+
+    tabela = pd.DataFrame({
+        "data": df[colunas["data"]].map(_ler_data),
+        "hora": df[colunas["horario"]].map(lambda h: chave_horario(h)[0]),
+        "volume": pd.to_numeric(df[colunas["volume"]].astype(str).str.replace(",", "."), errors="coerce"),
+        "tma": pd.to_numeric(df[colunas["tma"]].astype(str).str.replace(",", "."), errors="coerce")
+        if "tma" in colunas else np.nan,
+    })
+    tabela = tabela[tabela["data"].notna() & (tabela["hora"] < 24) & tabela["volume"].notna()]
+    # TMA da hora ponderado pelo volume de cada sub-intervalo
+    tabela["tma_x_volume"] = tabela["tma"] * tabela["volume"]
+    por_hora = tabela.groupby(["data", "hora"], sort=True).agg(
+        volume=("volume", "sum"), tma_x_volume=("tma_x_volume", "sum"), com_tma=("tma", "count"))
+
+    previsao = {}
+    for data, grupo in por_hora.groupby(level="data", sort=False):
+        horas = grupo.index.get_level_values("hora")
+        volume = grupo["volume"].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tma = np.where((grupo["com_tma"] > 0) & (volume > 0), grupo["tma_x_volume"] / volume, np.nan)
+        previsao[data] = ([f"{h:02d}:00" for h in horas], volume, tma)
+    return previsao
+
+
+class MotorDimensionamento:
+    """Previsão local + curvas de nível de serviço por dia, prontas para varrer o SLA alvo.
+
+    O arquivo é relido só quando muda (tamanho/mtime). A curva de um dia (N agentes x
+    intervalo) sai uma vez por (dia, tma, tempo alvo); cada SLA alvo é só uma busca nela.
+    """
+
+    def __init__(self, caminhos):
+        self.caminhos = [caminhos] if isinstance(caminhos, str) else list(caminhos)
+        self.ultimo_erro = None
+        self._assinatura = None
+        self._previsao = {}
+        self._curvas = OrderedDict()  # {(assinatura, data, tma, tempo_alvo): curva}
+        self._lock = threading.Lock()
+
+    def _arquivo(self):
+        return next((c for c in self.caminhos if os.path.isfile(c)), None)
+
+    def previsao(self):
+        """{data: (horarios, volume, tma)} da versão atual do arquivo ({} se não há previsão)."""
+        caminho = self._arquivo()
+        if caminho is None:
+            return {}
+        info = os.stat(caminho)
+        assinatura = (caminho, info.st_size, info.st_mtime_ns)
+        with self._lock:
+            if assinatura == self._assinatura:
+                return self._previsao
+        try:
+            previsao = ler_previsao(caminho)
+            erro = None
+        except Exception as e:
+            print(f"Erro ao ler previsão de volume: {e}")
+            previsao, erro = {}, str(e)
+        with self._lock:
+            self._assinatura, self._previsao, self.ultimo_erro = assinatura, previsao, erro
+            self._curvas.clear()
+        return previsao
+
+    def curva_dia(self, data, tma_padrao=TMA_PADRAO, tempo_alvo=TEMPO_ALVO_PADRAO):
+        """(horarios, volume, curva intervalos x N) do dia, ou None sem previsão para ele."""
+        dia = self.previsao().get(data)
+        if dia is None:
+            return None
+        horarios, volume, tma = dia
+        chave = (self._assinatura, data, tma_padrao, tempo_alvo)
+        with self._lock:
+            curva = self._curvas.get(chave)
+            if curva is not None:
+                self._curvas.move_to_end(chave)
+                return horarios, volume, curva
+        with TELEMETRIA.medir("erlang_curva"):
+            curva = curva_nivel_servico(volume, np.where(np.isnan(tma), tma_padrao, tma), tempo_alvo)
+        curva.setflags(write=False)
+        with self._lock:
+            self._curvas[chave] = curva
+            while len(self._curvas) > MAX_CURVAS:
+                self._curvas.popitem(last=False)
+        return horarios, volume, curva
+
+    def gap(self, data, matriz_dim, sla_alvo=SLA_ALVO_PADRAO, tma_padrao=TMA_PADRAO, tempo_alvo=TEMPO_ALVO_PADRAO):
+        """DataFrame por horário: volume, necessários, escalados em CHAT, gap (+ sobra / - falta)
+        e nível de serviço projetado com a escala. None se o dia não tem previsão."""
+        dia = self.curva_dia(data, tma_padrao, tempo_alvo)
+        if dia is None:
+            return None
+        horarios, volume, curva = dia
+        necessarios = agentes_necessarios(curva, volume, sla_alvo)
+
+        escalados = np.zeros(len(horarios), dtype=np.int64)
+        if matriz_dim is not None:
+            por_hora = dict(zip((chave_horario(h)[:2] for h in matriz_dim.horarios), matriz_dim.chat_por_horario()))
+            escalados = np.array([por_hora.get(chave_horario(h)[:2], 0) for h in horarios], dtype=np.int64)
+
+        return pd.DataFrame({
+            "Horário": horarios,
+            "Volume": volume.round().astype(np.int64),
+            "Necessários": necessarios,
+            "Escalados": escalados,
+            "Gap": escalados - necessarios,
+            "SLA Projetado": nivel_com_agentes(curva, escalados),
+        })
@@ -0,0 +1,261 @@
+"""Fontes dos arquivos do Data Lake: GitHub (sessão HTTP com pool), pasta local e servidor Gist local.
+
+Toda fonte expõe baixar(etag_atual) -> None (nada mudou) ou (etag, {nome_do_arquivo: conteudo_str}).
+
+Rodar o app sem internet:
+    python fontes_dados.py --agentes 1000 --porta 8765
+e nos secrets:
+    GIST_API_URL = "http://127.0.0.1:8765/gists/{gist_id}"
+(ou FONTE_DADOS = "diretorio" com PASTA_DADOS apontando para os .json).
+"""
+import argparse
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetria import TELEMETRIA
+
+URL_API_GIST = "https://api.github.com/gists/{gist_id}"
+TIMEOUT_PADRAO = (5, 30)  # (conexão, leitura) em segundos
+TAMANHO_BLOCO = 256 * 1024
+LIMITE_TRUNCAR = 1024 * 1024  # a API do Gist corta o "content" de arquivos acima de ~1MB
+
+
+# ==========================================
+# GITHUB (API DE GISTS)
+# ==========================================
+class FonteGitHub:
+    """API de Gists com uma requests.Session persistente (keep-alive + pool) e timeout em tudo."""
+
+    def __init__(self, gist_id, token, url_api=None, timeout=TIMEOUT_PADRAO, pool=4):
+        self.url = (url_api or URL_API_GIST).format(gist_id=gist_id)
+        self.timeout = timeout
+        self.sessao = requests.Session()
+        self.sessao.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        })
+        adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=pool)
+        self.sessao.mount("https://", adaptador)
+        self.sessao.mount("http://", adaptador)
+        # raw_url muda junto com o conteúdo do arquivo: o que não mudou não desce de novo
+        self._brutos = {}  # {raw_url: texto} da última versão
+
+    def baixar(self, etag_atual):
+        headers = {"If-None-Match": etag_atual} if etag_atual else {}
+        resposta = self.sessao.get(self.url, headers=headers, timeout=self.timeout)
+        if resposta.status_code == 304:
+            return None
+        if resposta.status_code != 200:
+            raise RuntimeError(f"Erro ao conectar no GitHub: {resposta.status_code}")
+
+        arquivos = {}
+        truncados = {}
+        for nome, info in resposta.json().get("files", {}).items():
+            # Se o JSON for gigante (> 1MB), pegamos a URL bruta
+            if info.get("truncated", False):
+                truncados[nome] = info["raw_url"]
+            else:
+                arquivos[nome] = info.get("content", "")
+
+        # Truncados (escala inteira ou abas grandes fatiadas) descem ao mesmo tempo,
+        # pelas conexões do pool; os de raw_url já conhecida vêm da versão anterior
+        faltando = {nome: url for nome, url in truncados.items() if url not in self._brutos}
+        if faltando:
+            with ThreadPoolExecutor(max_workers=min(8, len(faltando))) as pool:
+                textos = pool.map(self._baixar_bruto, faltando.values())
+                self._brutos.update(zip(faltando.values(), textos))
+        arquivos.update({nome: self._brutos[url] for nome, url in truncados.items()})
+        self._brutos = {url: self._brutos[url] for url in truncados.values()}
+        return resposta.headers.get("ETag"), arquivos
+
+    @TELEMETRIA.cronometrar("gist_download_bruto")
+    def _baixar_bruto(self, raw_url):
+        """Arquivo truncado lido em blocos: cada bloco é decodificado e solto na hora,
+        sem manter o corpo inteiro em bytes (resp.content) ao lado do texto."""
+        with self.sessao.get(raw_url, timeout=self.timeout, stream=True) as raw_resp:
+            raw_resp.raise_for_status()
+            decodificador = codecs.getincrementaldecoder(raw_resp.encoding or "utf-8")()
+            partes = [decodificador.decode(bloco) for bloco in raw_resp.iter_content(TAMANHO_BLOCO)]
+            partes.append(decodificador.decode(b"", final=True))
+        return "".join(partes)
+
+
+# ==========================================
+# PASTA LOCAL
+# ==========================================
+def ler_texto_mmap(caminho):
+    """Conteúdo UTF-8 do arquivo decodificado direto do mapeamento (sem cópia intermediária em bytes)."""
+    with open(caminho, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            with memoryview(mapa) as visao:
+                return str(visao, "utf-8")
+
+
+class FonteDiretorio:
+    """Os *.json de uma pasta. O ETag sai de nome + tamanho + mtime, então só relê quando algo
+    muda, e aí só os arquivos que mudaram (ex.: uma aba da escala fatiada)."""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self._lidos = {}  # {nome: ((tamanho, mtime_ns), texto)}
+
+    def _arquivos(self):
+        return sorted(n for n in os.listdir(self.pasta) if n.endswith(".json"))
+
+    def _assinaturas(self, nomes):
+        assinaturas = {}
+        for nome in nomes:
+            info = os.stat(os.path.join(self.pasta, nome))
+            assinaturas[nome] = (info.st_size, info.st_mtime_ns)
+        return assinaturas
+
+    @staticmethod
+    def _etag(assinaturas):
+        h = hashlib.sha256()
+        for nome, (tamanho, mtime) in assinaturas.items():
+            h.update(f"{nome}:{tamanho}:{mtime};".encode("utf-8"))
+        return f'"{h.hexdigest()[:32]}"'
+
+    def baixar(self, etag_atual):
+        assinaturas = self._assinaturas(self._arquivos())
+        etag = self._etag(assinaturas)
+        if etag == etag_atual:
+            return None
+        lidos = {}
+        for nome, assinatura in assinaturas.items():
+            anterior = self._lidos.get(nome)
+            if anterior is not None and anterior[0] == assinatura:
+                lidos[nome] = anterior
+            else:
+                lidos[nome] = (assinatura, ler_texto_mmap(os.path.join(self.pasta, nome)))
+        self._lidos = lidos
+        return etag, {nome: texto for nome, (_, texto) in lidos.items()}
+
+
+# ==========================================
+# SERVIDOR GIST LOCAL (TESTE DE CARGA / OFFLINE)
+# ==========================================
+class ServidorGistLocal:
+    """Imita GET /gists/<id> da API: ETag/If-None-Match -> 304, e arquivos acima do limite
+    vêm com truncated=true e raw_url para GET /raw/<revisão>/<nome>."""
+
+    def __init__(self, arquivos, host="127.0.0.1", porta=0, limite_truncar=LIMITE_TRUNCAR):
+        self.limite_truncar = limite_truncar
+        self._lock = threading.Lock()
+        self.publicar(arquivos)
+        self.servidor = ThreadingHTTPServer((host, porta), self._handler())
+        self.servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url_api(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}/gists/{{gist_id}}"
+
+    def publicar(self, arquivos):
+        """Troca o conteúdo servido (simula um commit no Gist)."""
+        h = hashlib.sha256()
+        for nome in sorted(arquivos):
+            h.update(nome.encode("utf-8") + b"\0" + arquivos[nome].encode("utf-8") + b"\0")
+        with self._lock:
+            self._arquivos = dict(arquivos)
+            self._etag = f'"{h.hexdigest()[:32]}"'
+
+    def _resposta_api(self, base_url):
+        with self._lock:
+            arquivos, etag = self._arquivos, self._etag
+        files = {}
+        for nome, conteudo in arquivos.items():
+            truncado = len(conteudo.encode("utf-8")) > self.limite_truncar
+            files[nome] = {
+                "filename": nome,
+                "size": len(conteudo.encode("utf-8")),
+                "truncated": truncado,
+                "content": conteudo[:self.limite_truncar] if truncado else conteudo,
+                # Como no GitHub, a raw_url leva a revisão do arquivo: muda junto com o conteúdo
+                "raw_url": f"{base_url}/raw/{hashlib.sha1(conteudo.encode('utf-8')).hexdigest()}/{nome}",
+            }
+        return etag, json.dumps({"files": files}, ensure_ascii=False).encode("utf-8")
+
+    def _handler(self):
+        servidor_gist = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como o GitHub
+
+            def _enviar(self, status, corpo=b"", etag=None, tipo="application/json; charset=utf-8"):
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                base_url = f"http://{self.headers.get('Host')}"
+                if self.path.startswith("/gists/"):
+                    etag, corpo = servidor_gist._resposta_api(base_url)
+                    if self.headers.get("If-None-Match") == etag:
+                        self._enviar(304, etag=etag)
+                    else:
+                        self._enviar(200, corpo, etag=etag)
+                elif self.path.startswith("/raw/"):
+                    nome = self.path[len("/raw/"):].split("/", 1)[-1]
+                    with servidor_gist._lock:
+                        conteudo = servidor_gist._arquivos.get(nome)
+                    if conteudo is None:
+                        self._enviar(404)
+                    else:
+                        self._enviar(200, conteudo.encode("utf-8"), tipo="text/plain; charset=utf-8")
+                else:
+                    self._enviar(404)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.servidor.serve_forever, name="gist-local", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor Gist local com escala sintética ou uma pasta de .json")
+    parser.add_argument("--pasta", help="serve os *.json desta pasta (senão gera uma escala sintética)")
+    parser.add_argument("--agentes", type=int, default=1000)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--fatiado", action="store_true", help="escala sintética como manifesto + um arquivo por aba")
+    args = parser.parse_args(argv)
+
+    if args.pasta:
+        _, arquivos = FonteDiretorio(args.pasta).baixar(None)
+    else:
+        from gerador_escala import gerar_arquivos
+        arquivos = gerar_arquivos(args.agentes, fatiado=args.fatiado)
+
+    servidor = ServidorGistLocal(arquivos, porta=args.porta)
+    print(f"Gist local em {servidor.url_api}")
+    servidor.servidor.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""escala_cx.json / metricas_cx.json sintéticos, no mesmo formato do Gist, para benchmarks e testes locais."""
+import calendar
+import json
+import math
+import random
+from datetime import date
+
+from snapshot_gist import fatiar_escala
+
+NOMES_MESES = ["JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL", "MAIO", "JUNHO", "JULHO",
+               "AGOSTO", "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"]
+
+# (nome do bloco, ilha dos agentes, fração do headcount). O nome do bloco vira a
+# linha separadora preta da grade, como na planilha real.
+BLOCOS = [
+    (None, "Suporte", 0.45),
+    (None, "Emergência", 0.2),
+    ("FINANCEIRO", "Financeiro", 0.1),
+    ("E-MAIL", "E-mail", 0.1),
+    ("PLENO", "Suporte/Emergência", 0.1),
+    ("N2", "N2", 0.05),
+]
+AGENTES_POR_LIDER = 12
+HORARIOS_DIM = [f"{h:02d}:00" for h in range(7, 24)]
+HORAS_TURNO = 9
+ENTRADAS = ["07:00", "08:00", "09:00", "10:00", "11:00", "12:00", "13:00", "14:00"]
+STATUS_MES = ["T"] * 70 + ["F"] * 22 + ["FR"] * 5 + ["AF"] * 3
+ATIVIDADES_TURNO = ["CHAT"] * 16 + ["EMAIL"] * 2 + ["TREINO", "FINANCEIRO", "1:1", "BACKOFFICE"]
+FRACAO_FOLGA_DIM = 0.2
+FRACAO_DIVERGENCIA = 0.005  # DIMs que contrariam o status do mês (para a conferência ter o que mostrar)
+
+
+def _agentes(n_agentes, rnd):
+    """[(bloco, nome, líder, ilha, e-mail)] na ordem em que aparecem nas abas."""
+    agentes = []
+    inicio = 0
+    for i, (bloco, ilha, fracao) in enumerate(BLOCOS):
+        fim = n_agentes if i == len(BLOCOS) - 1 else inicio + round(n_agentes * fracao)
+        for n in range(inicio, fim):
+            lider = f"Líder {n // AGENTES_POR_LIDER + 1:03d}"
+            agentes.append((bloco, f"Agente {n + 1:05d}", lider, ilha, f"agente{n + 1:05d}@turbi.com.br"))
+        inicio = fim
+    rnd.shuffle(agentes)
+    ordem = {bloco: i for i, (bloco, _, _) in enumerate(BLOCOS)}
+    return sorted(agentes, key=lambda a: ordem[a[0]])
+
+
+def _com_separadores(agentes, linha_agente, largura):
+    """Linhas da aba com a linha do bloco (ex.: FINANCEIRO) antes do primeiro agente dele."""
+    linhas = []
+    bloco_atual = None
+    for agente in agentes:
+        if agente[0] != bloco_atual:
+            bloco_atual = agente[0]
+            if bloco_atual:
+                linhas.append([bloco_atual] + [""] * (largura - 1))
+        linhas.append(linha_agente(agente))
+    return linhas
+
+
+def aba_mensal(agentes, ano, mes, rnd):
+    dias = [f"{d:02d}/{mes:02d}" for d in range(1, calendar.monthrange(ano, mes)[1] + 1)]
+    cabecalho = ["NOME", "LÍDER", "ILHA", "E-MAIL", "ADMISSÃO"] + dias
+    titulo = [f"ESCALA {NOMES_MESES[mes - 1]} {ano}"] + [""] * (len(cabecalho) - 1)
+
+    def linha(agente):
+        _, nome, lider, ilha, email = agente
+        return [nome, lider, ilha, email, "01/01/2024"] + [rnd.choice(STATUS_MES) for _ in dias]
+
+    return [titulo, cabecalho] + _com_separadores(agentes, linha, len(cabecalho))
+
+
+def aba_dim(agentes, rnd, status_do_dia=None):
+    """status_do_dia: {nome: status na aba mensal}; quem não está "T" fica de folga na DIM."""
+    cabecalho = ["NOME", "LÍDER", "ILHA", "ENTRADA", "HORÁRIO"] + HORARIOS_DIM
+
+    def linha(agente):
+        _, nome, lider, ilha, _ = agente
+        folga = rnd.random() < FRACAO_FOLGA_DIM if status_do_dia is None else status_do_dia.get(nome) != "T"
+        if rnd.random() < FRACAO_DIVERGENCIA:
+            folga = not folga
+        if folga:
+            return [nome, lider, ilha, "", "FOLGA"] + ["F"] * len(HORARIOS_DIM)
+        entrada = rnd.choice(ENTRADAS)
+        h0 = int(entrada[:2])
+        pausa = h0 + rnd.randint(3, 5)
+        celulas = []
+        for horario in HORARIOS_DIM:
+            h = int(horario[:2])
+            if not h0 <= h < h0 + HORAS_TURNO: celulas.append("")
+            elif h == pausa: celulas.append("P")
+            else: celulas.append(rnd.choice(ATIVIDADES_TURNO))
+        return [nome, lider, ilha, entrada, f"{entrada} - {h0 + HORAS_TURNO:02d}:00"] + celulas
+
+    return [cabecalho] + _com_separadores(agentes, linha, len(cabecalho))
+
+
+def aba_plantao(ano, rnd):
+    """Aba anual "ESCALA AA STAFF": duas linhas de título e uma linha por dia."""
+    linhas = [["", "DATA", "STAFF", "", "", "URGÊNCIA", "TELEFONE"], [""] * 7]
+    dia = date(ano, 1, 1)
+    while dia.year == ano:
+        linhas.append(["", dia.strftime("%d/%m/%Y"), f"Staff {rnd.randint(1, 8)}", "", "",
+                       f"Urgência {rnd.randint(1, 5)}", f"11 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}"])
+        dia = date.fromordinal(dia.toordinal() + 1)
+    return linhas
+
+
+def gerar_escala(n_agentes, ano=2026, mes=10, n_dims=7, semente=42):
+    """Dict do escala_cx.json: Mês, n_dims DIMs a partir do dia 1, Pessoas e STAFF do ano."""
+    rnd = random.Random(semente)
+    agentes = _agentes(n_agentes, rnd)
+    mensal = aba_mensal(agentes, ano, mes, rnd)
+    # Cada DIM segue o status do dia na aba mensal (coluna 5 + dia - 1)
+    dims = {
+        f"DIM {d:02d}/{mes:02d}": aba_dim(agentes, rnd, {l[0]: l[4 + d] for l in mensal[2:] if len(l) > 4 + d and l[1]})
+        for d in range(1, min(n_dims, calendar.monthrange(ano, mes)[1]) + 1)
+    }
+    pessoas = sorted({(lider, ilha) for _, _, lider, ilha, _ in agentes})
+    return {
+        "Meses": {NOMES_MESES[mes - 1]: mensal},
+        "DIMs": dims,
+        "Pessoas": [{"Lider": lider, "Ilha": ilha} for lider, ilha in pessoas],
+        f"ESCALA {ano % 100:02d} STAFF": aba_plantao(ano, rnd),
+    }
+
+
+def gerar_metricas(n_agentes, semente=42):
+    """Dict do metricas_cx.json com a aba Resultados_Atuais."""
+    rnd = random.Random(semente)
+    cabecalho = ["NOME", "E-MAIL", "LÍDER", "ILHA", "TMA", "CSAT", "FCR",
+                 "META 1", "% ATINGIMENTO 1", "META 2", "% ATINGIMENTO 2", "META 3", "% ATINGIMENTO 3",
+                 "PONTUAÇÃO FINAL", "QUALIDADE", "NCG", "STATUSFINAL", "BONIFICAÇÃO FINAL"]
+    linhas = [["RESULTADOS"] + [""] * (len(cabecalho) - 1), cabecalho]
+    for n in range(1, n_agentes + 1):
+        linhas.append([
+            f"Agente {n:05d}", f"agente{n:05d}@turbi.com.br", f"Líder {(n - 1) // AGENTES_POR_LIDER + 1:03d}", "Suporte",
+            f"{rnd.uniform(4, 12):.1f}".replace(".", ","), f"{rnd.uniform(70, 99):.1f}%".replace(".", ","),
+            f"{rnd.uniform(60, 95):.1f}%".replace(".", ","),
+            "8", f"{rnd.uniform(50, 130):.0f}%", "90%", f"{rnd.uniform(50, 130):.0f}%", "80%", f"{rnd.uniform(50, 130):.0f}%",
+            f"{rnd.uniform(50, 120):.1f}".replace(".", ","), f"{rnd.uniform(80, 100):.0f}%", str(rnd.randint(0, 4)),
+            rnd.choice(["ATINGIU", "NÃO ATINGIU"]), f"R$ {rnd.randint(0, 800)},00",
+        ])
+    return {"Resultados_Atuais": linhas}
+
+
+def gerar_previsao(n_agentes, ano=2026, mes=10, n_dims=7, tma=300, semente=42):
+    """CSV de previsão de volume (data,horario,volume,tma) dos mesmos dias das DIMs,
+    em meia hora, com pico à tarde e volume proporcional ao headcount."""
+    rnd = random.Random(semente)
+    linhas = ["data,horario,volume,tma"]
+    for d in range(1, min(n_dims, calendar.monthrange(ano, mes)[1]) + 1):
+        for horario in HORARIOS_DIM:
+            h = int(horario[:2])
+            perfil = 0.3 + 0.7 * math.exp(-((h - 14) / 4) ** 2)
+            for minuto in ("00", "30"):
+                volume = n_agentes * 3 * perfil * rnd.uniform(0.85, 1.15)
+                linhas.append(f"{d:02d}/{mes:02d}/{ano},{h:02d}:{minuto},{volume:.0f},{tma * rnd.uniform(0.9, 1.1):.0f}")
+    return "\n".join(linhas) + "\n"
+
+
+def gerar_arquivos(n_agentes, fatiado=False, **kwargs):
+    """{nome_do_arquivo: conteúdo_str} como o Gist devolve. fatiado=True troca o
+    escala_cx.json pelo manifesto_escala.json + um arquivo por aba."""
+    semente = kwargs.get("semente", 42)
+    escala = gerar_escala(n_agentes, **kwargs)
+    arquivos = fatiar_escala(escala) if fatiado else {"escala_cx.json": json.dumps(escala, ensure_ascii=False)}
+    arquivos["metricas_cx.json"] = json.dumps(gerar_metricas(n_agentes, semente), ensure_ascii=False)
+    return arquivos
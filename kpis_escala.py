@@ -0,0 +1,275 @@
+"""KPIs da escala calculados em uma passada vetorizada por aba."""
+import numpy as np
+import pandas as pd
+
+# Grupos de ilha em bits: uma ilha "Suporte/Emergência" conta nos dois
+GRUPO_SUPORTE = 1
+GRUPO_EMERGENCIA = 2
+N_GRUPOS = 4
+GRUPOS_SUPORTE = [1, 3]
+GRUPOS_EMERGENCIA = [2, 3]
+GRUPOS_SUP_EMERG = [1, 2, 3]
+
+
+def grupos_ilha(df):
+    """Código 0..3 por linha (bit 1 = Suporte, bit 2 = Emergência)."""
+    if 'ILHA' not in df.columns:
+        return np.zeros(len(df), dtype=np.int64)
+    ilha = df['ILHA'].astype(str)
+    eh_suporte = ilha.str.contains('Suporte', case=False, na=False).to_numpy()
+    eh_emergencia = ilha.str.contains('Emergência|Emergencia', case=False, na=False).to_numpy()
+    return eh_suporte * GRUPO_SUPORTE + eh_emergencia * GRUPO_EMERGENCIA
+
+
+def codigos_celulas(df, colunas):
+    """(códigos int linhas x colunas, valores). Se as colunas já são Categorical com o
+    vocabulário comum da versão, os códigos saem direto, sem olhar texto nenhum."""
+    series = [df[c] for c in colunas]
+    if series and all(isinstance(s.dtype, pd.CategoricalDtype) and s.dtype == series[0].dtype for s in series):
+        valores = list(series[0].cat.categories)
+        codigos = np.column_stack([s.cat.codes.to_numpy() for s in series]).astype(np.int64)
+        if (codigos < 0).any():
+            valores.append(np.nan)
+            codigos[codigos < 0] = len(valores) - 1
+        return codigos, valores
+    matriz = df[colunas].to_numpy(dtype=object)
+    codigos, unicos = pd.factorize(matriz.ravel(), use_na_sentinel=False)
+    return codigos.reshape(matriz.shape), list(unicos)
+
+
+def codificar_status(df, colunas):
+    """Códigos de status (texto em maiúsculo e sem espaços) + vocabulário."""
+    codigos_brutos, unicos = codigos_celulas(df, colunas)
+    normalizados = [str(v).upper().strip() for v in unicos]
+    codigos_norm, vocab = pd.factorize(pd.Index(normalizados, dtype=object))
+    return codigos_norm[codigos_brutos], list(vocab)
+
+
+class MatrizKpiMensal:
+    """Contagem dia x status x grupo de ilha de uma aba de Mês, montada uma vez por versão."""
+
+    def __init__(self, df_mensal):
+        self.dias = [c for c in df_mensal.columns if '/' in c]
+        self.tem_ilha = 'ILHA' in df_mensal.columns
+        self._pos_dia = {dia: i for i, dia in enumerate(self.dias)}
+
+        if not self.dias:
+            self.status = []
+            self._pos_status = {}
+            self.contagens = np.zeros((0, 0, N_GRUPOS), dtype=np.int64)
+            return
+
+        # (linhas x dias) -> códigos de status; uma única bincount monta o cubo inteiro
+        codigos, self.status = codificar_status(df_mensal, self.dias)
+        n_dias, n_status = len(self.dias), len(self.status)
+        grupos = np.broadcast_to(grupos_ilha(df_mensal)[:, None], codigos.shape)
+        indice_dia = np.broadcast_to(np.arange(n_dias)[None, :], codigos.shape)
+
+        plano = (indice_dia * n_status + codigos) * N_GRUPOS + grupos
+        self.contagens = np.bincount(plano.ravel(), minlength=n_dias * n_status * N_GRUPOS).reshape(n_dias, n_status, N_GRUPOS)
+        self._pos_status = {s: i for i, s in enumerate(self.status)}
+
+    def contar(self, status, grupos=None, dia=None):
+        """Quantas células com esse status (por dia, ou vetor com todos os dias)."""
+        pos = self._pos_status.get(status)
+        if pos is None:
+            return 0 if dia is not None else np.zeros(len(self.dias), dtype=np.int64)
+        fatia = self.contagens[:, pos, :]
+        por_dia = fatia.sum(axis=1) if grupos is None else fatia[:, grupos].sum(axis=1)
+        return por_dia if dia is None else por_dia[self._pos_dia[dia]]
+
+    def kpis(self, data_escolhida):
+        metrics = {"NoChat": 0, "Folga": 0, "Suporte": 0, "Emergencia": 0}
+        if data_escolhida in self._pos_dia:
+            metrics["Folga"] = self.contar("F", dia=data_escolhida)
+            if self.tem_ilha:
+                metrics["NoChat"] = self.contar("T", GRUPOS_SUP_EMERG, data_escolhida)
+                metrics["Suporte"] = self.contar("T", GRUPOS_SUPORTE, data_escolhida)
+                metrics["Emergencia"] = self.contar("T", GRUPOS_EMERGENCIA, data_escolhida)
+        return metrics
+
+    def picos_vales(self):
+        if not self.dias: return None
+        # Sem coluna ILHA todo mundo entra (igual à versão antiga)
+        t_por_dia = self.contar("T", GRUPOS_SUP_EMERG if self.tem_ilha else None)
+        i_max, i_min = int(np.argmax(t_por_dia)), int(np.argmin(t_por_dia))
+        return {"max_dia": self.dias[i_max], "max_val": t_por_dia[i_max], "min_dia": self.dias[i_min], "min_val": t_por_dia[i_min]}
+
+
+def calcular_picos_vales_mensal(df_mensal):
+    return MatrizKpiMensal(df_mensal).picos_vales()
+
+
+# ==========================================
+# DIMs: MATRIZ DE ATIVIDADES (AGENTES x HORÁRIOS)
+# ==========================================
+# Bits por célula com as mesmas regras de texto que as telas sempre usaram
+TEM_CHAT = 1        # contém "CHAT"
+TEM_F = 2           # contém "F" (folga, mas também FINANCEIRO etc.)
+TEM_P = 4           # contém "P"
+TEM_TREINO = 8      # contém "TREINO"
+TEM_TRABALHO = 16   # contém CHAT|EMAIL|E-MAIL|P|TREINO|1:1|FINANCEIRO
+EH_CHAT = 32        # exatamente "CHAT"
+EH_PAUSA = 64       # exatamente "P" ou "PAUSA"
+TEM_ATIVIDADE = 128  # qualquer coisa preenchida que não seja folga (CHAT, RT, BACKOFFICE, REEMBOLSOS...)
+
+PALAVRAS_TRABALHO = ['CHAT', 'EMAIL', 'E-MAIL', 'P', 'TREINO', '1:1', 'FINANCEIRO']
+
+
+def bits_valor(val):
+    val_up = str(val).upper()
+    val_str = val_up.strip()
+    bits = 0
+    if 'CHAT' in val_up: bits |= TEM_CHAT
+    if 'F' in val_up: bits |= TEM_F
+    if 'P' in val_up: bits |= TEM_P
+    if 'TREINO' in val_up: bits |= TEM_TREINO
+    if any(p in val_up for p in PALAVRAS_TRABALHO): bits |= TEM_TRABALHO
+    if val_str == 'CHAT': bits |= EH_CHAT
+    if val_str in ('P', 'PAUSA'): bits |= EH_PAUSA
+    if val_str not in ('', 'F', 'FOLGA', 'NAN', 'NONE'): bits |= TEM_ATIVIDADE
+    return bits
+
+
+class MatrizAtividadesDim:
+    """Aba DIM codificada uma vez: matriz de bits por agente x horário.
+
+    Cada valor distinto é classificado uma única vez (bits_valor); o resto
+    são operações de array sobre a matriz.
+    """
+
+    def __init__(self, df_dim):
+        self.horarios = [c for c in df_dim.columns if ':' in c]
+        self.indice = df_dim.index
+        self.eh_sup_emerg = grupos_ilha(df_dim) > 0
+
+        codigos, unicos = codigos_celulas(df_dim, self.horarios)
+        forma = (len(df_dim), len(self.horarios))
+        tabela_bits = np.array([bits_valor(v) for v in unicos], dtype=np.uint8)
+        self.bits = tabela_bits[codigos.reshape(forma)] if len(unicos) else np.zeros(forma, dtype=np.uint8)
+
+        # OR de todas as células da linha = "a linha contém ..."
+        self.bits_linha = np.bitwise_or.reduce(self.bits, axis=1) if self.horarios else np.zeros(len(df_dim), dtype=np.uint8)
+
+    def posicoes(self, df):
+        """Posições na matriz das linhas de um recorte (filtrado) da mesma aba."""
+        return self.indice.get_indexer(df.index)
+
+    def resumo(self):
+        if not self.horarios: return {"Trabalhando": 0, "Folga": 0}
+        linha = self.bits_linha
+        folga = (linha & TEM_F > 0) & (linha & TEM_TRABALHO == 0) & self.eh_sup_emerg
+        return {"Trabalhando": int((linha & TEM_CHAT > 0).sum()), "Folga": int(folga.sum())}
+
+    def gargalos(self):
+        cols = [i for i, c in enumerate(self.horarios) if 9 <= int(c.split(':')[0]) <= 22]
+        if not cols: return None
+        chat_por_hora = self.chat_por_horario()[cols]
+        pausa_por_hora = (self.bits[:, cols] & EH_PAUSA > 0).sum(axis=0)
+        i_min, i_max = int(np.argmin(chat_por_hora)), int(np.argmax(pausa_por_hora))
+        return {"min_chat_hora": self.horarios[cols[i_min]], "min_chat_valor": int(chat_por_hora[i_min]),
+                "max_pausa_hora": self.horarios[cols[i_max]], "max_pausa_valor": int(pausa_por_hora[i_max])}
+
+    def chat_por_horario(self):
+        """Agentes exatamente em CHAT em cada horário da aba."""
+        return (self.bits & EH_CHAT > 0).sum(axis=0)
+
+    def mascara_modo(self, modo, posicoes=None):
+        linha = self.bits_linha if posicoes is None else self.bits_linha[posicoes]
+        if modo == "💬 Apenas Chat":
+            return linha & TEM_CHAT > 0
+        if modo == "🚫 Apenas Folgas":
+            return (linha & TEM_F > 0) & (linha & (TEM_CHAT | TEM_P | TEM_TREINO) == 0)
+        return np.ones(len(linha), dtype=bool)
+
+
+def calcular_resumo_dia_dim(df_dim):
+    return MatrizAtividadesDim(df_dim).resumo()
+
+
+def filtrar_e_ordenar_dim(df, modo, matriz=None):
+    """Filtra pelo modo e ordena pela ENTRADA. Com a matriz da aba, não recodifica nada."""
+    if modo not in ("💬 Apenas Chat", "🚫 Apenas Folgas"):
+        return df
+    if matriz is None:
+        matriz = MatrizAtividadesDim(df)
+    df_f = df[matriz.mascara_modo(modo, matriz.posicoes(df))]
+    if 'ENTRADA' not in df_f.columns:
+        return df_f
+    ordem = pd.to_datetime(df_f['ENTRADA'], format='%H:%M', errors='coerce').sort_values(na_position='last')
+    return df_f.loc[ordem.index]
+
+
+# ==========================================
+# PERÍODO: VÁRIAS DIMs EMPILHADAS (DIAS x AGENTES x HORÁRIOS)
+# ==========================================
+def chave_horario(horario):
+    """ "07:00" -> (7, 0, "07:00"): ordena horários ("7:00" antes de "10:00"); [:2] é a hora:minuto."""
+    hora, _, minuto = str(horario).strip().partition(':')
+    try:
+        return int(hora), int(minuto[:2] or 0), horario
+    except ValueError:
+        return 99, 0, horario
+
+
+class CuboAtividadesDim:
+    """DIMs de um período num único array uint8 dias x agentes x horários (bits da célula).
+
+    Os agentes são alinhados pelo NOME entre as abas (quem não está numa DIM fica
+    vazio naquele dia) e os horários são a união dos horários das abas, em ordem.
+    Monta a partir das MatrizAtividadesDim já prontas: nenhuma célula é reclassificada.
+    """
+
+    def __init__(self, dias, dfs, matrizes):
+        self.dias = list(dias)
+        self.horarios = sorted({h for m in matrizes for h in m.horarios}, key=chave_horario)
+        pos_horario = {h: i for i, h in enumerate(self.horarios)}
+
+        nomes_por_dia = []
+        for df in dfs:
+            nomes = df['NOME'] if 'NOME' in df.columns else pd.Series('', index=df.index)
+            nomes_por_dia.append(nomes.astype(str).str.strip().to_numpy(dtype=object))
+        todos = np.concatenate(nomes_por_dia) if nomes_por_dia else np.array([], dtype=object)
+        codigos, self.agentes = pd.factorize(todos)
+
+        # linhas[d][pos] = agente da linha pos da DIM do dia d (-1: linha sem nome/separador)
+        self.linhas = []
+        inicio = 0
+        for nomes in nomes_por_dia:
+            agentes_dia = codigos[inicio:inicio + len(nomes)].astype(np.int64)
+            agentes_dia[nomes == ''] = -1
+            self.linhas.append(agentes_dia)
+            inicio += len(nomes)
+
+        self.bits = np.zeros((len(self.dias), len(self.agentes), len(self.horarios)), dtype=np.uint8)
+        for d, (matriz, agentes_dia) in enumerate(zip(matrizes, self.linhas)):
+            if not matriz.horarios: continue
+            cols = np.array([pos_horario[h] for h in matriz.horarios])
+            validas = np.flatnonzero(agentes_dia >= 0)
+            # Nome repetido na mesma aba soma as atividades (OR) em vez de sobrescrever
+            np.bitwise_or.at(self.bits[d], (agentes_dia[validas][:, None], cols[None, :]), matriz.bits[validas])
+
+        self.chat = (self.bits & EH_CHAT) > 0
+        self.cobertura_total = self.chat.sum(axis=1)  # dias x horários, sem filtro
+
+    def cobertura_chat(self, posicoes_por_dia=None):
+        """Agentes em CHAT por dia x horário. posicoes_por_dia: linhas de cada DIM que
+        passam nos filtros (None = aba inteira), como em IndiceFiltros.posicoes."""
+        if posicoes_por_dia is None or all(p is None for p in posicoes_por_dia):
+            return self.cobertura_total
+        cobertura = self.cobertura_total.copy()
+        for d, posicoes in enumerate(posicoes_por_dia):
+            if posicoes is None: continue
+            agentes = np.unique(self.linhas[d][posicoes])
+            cobertura[d] = self.chat[d, agentes[agentes >= 0]].sum(axis=0)
+        return cobertura
+
+    def extremos(self, cobertura, hora_ini=9, hora_fim=22):
+        """Menor e maior cobertura (dia, horário, valor) dentro do horário comercial."""
+        cols = [i for i, h in enumerate(self.horarios) if hora_ini <= chave_horario(h)[0] <= hora_fim]
+        if not cols or not self.dias: return None
+        recorte = cobertura[:, cols]
+        d_min, h_min = np.unravel_index(int(np.argmin(recorte)), recorte.shape)
+        d_max, h_max = np.unravel_index(int(np.argmax(recorte)), recorte.shape)
+        return {"min_dia": self.dias[d_min], "min_hora": self.horarios[cols[h_min]], "min_valor": int(recorte[d_min, h_min]),
+                "max_dia": self.dias[d_max], "max_hora": self.horarios[cols[h_max]], "max_valor": int(recorte[d_max, h_max])}
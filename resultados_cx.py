@@ -0,0 +1,82 @@
+"""Índice e-mail -> resultados do metricas_cx.json, montado uma vez por versão."""
+
+
+def limpar_num(texto):
+    """ "87,5%" -> 87.5 ; qualquer coisa não numérica vira 0.0"""
+    try: return float(str(texto).replace("%", "").replace(",", ".").strip())
+    except (TypeError, ValueError): return 0.0
+
+
+class IndiceMetricas:
+    """Resultados_Atuais indexado por e-mail, com os campos numéricos já convertidos.
+
+    estado: "ok", "sem_cabecalho" (não achou a linha de E-MAIL) ou "indisponivel".
+    """
+
+    def __init__(self, dados_metricas):
+        self.registros = {}
+        self.cabecalho = []
+
+        if not dados_metricas or "Resultados_Atuais" not in dados_metricas:
+            self.estado = "indisponivel"
+            return
+
+        matriz_resultados = dados_metricas["Resultados_Atuais"]
+        indice_cabecalho = -1
+        for i, linha in enumerate(matriz_resultados[:10]):
+            linha_upper = [str(x).upper().strip() for x in linha]
+            if "E-MAIL" in linha_upper or "EMAIL" in linha_upper:
+                indice_cabecalho = i
+                self.cabecalho = linha_upper
+                break
+
+        if indice_cabecalho == -1:
+            self.estado = "sem_cabecalho"
+            return
+
+        self.estado = "ok"
+        self._posicoes = {}
+        for i, nome in enumerate(self.cabecalho):
+            self._posicoes.setdefault(nome, i)
+
+        for linha in matriz_resultados[indice_cabecalho + 1:]:
+            if len(linha) > 1:
+                email = str(linha[1]).strip().lower()
+                # Igual à busca linear antiga: vale a primeira linha do e-mail
+                if email and email not in self.registros:
+                    self.registros[email] = self._montar_registro(linha)
+
+    def _valor(self, linha, nome_coluna):
+        idx = self._posicoes.get(nome_coluna)
+        if idx is None or idx >= len(linha):
+            return "-"
+        return str(linha[idx]).strip()
+
+    def _montar_registro(self, linha):
+        cab = self.cabecalho
+        metricas = []
+        for n in range(1, 4):
+            pos = 3 + n  # colunas 4, 5 e 6 trazem o resultado real de cada métrica
+            real_str = linha[pos] if len(linha) > pos else "-"
+            meta_str = self._valor(linha, f"META {n}")
+            ating_str = self._valor(linha, f"% ATINGIMENTO {n}")
+            metricas.append({
+                "nome": cab[pos] if len(cab) > pos else f"Métrica {n}",
+                "real_str": real_str, "meta_str": meta_str, "ating_str": ating_str,
+                "real": limpar_num(real_str), "meta": limpar_num(meta_str), "atingimento": limpar_num(ating_str),
+            })
+
+        pontuacao_str = self._valor(linha, "PONTUAÇÃO FINAL")
+        return {
+            "metricas": metricas,
+            "status_final": self._valor(linha, "STATUSFINAL"),
+            "bonus_final": self._valor(linha, "BONIFICAÇÃO FINAL"),
+            "pontuacao_str": pontuacao_str,
+            "pontuacao": limpar_num(pontuacao_str),
+            "qualidade": self._valor(linha, "QUALIDADE"),
+            "ncg": self._valor(linha, "NCG"),
+        }
+
+    def buscar(self, email):
+        """Registro do usuário (dict) ou None: uma consulta de dicionário."""
+        return self.registros.get(str(email).strip().lower())
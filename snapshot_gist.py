@@ -0,0 +1,309 @@
+"""Snapshot único do Gist (Data Lake) com revalidação por ETag e cópia em disco."""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from telemetria import TELEMETRIA
+
+NOME_ARQUIVO_DISCO = "gist_snapshot.json"
+ARQUIVO_ESCALA = "escala_cx.json"
+ARQUIVO_MANIFESTO = "manifesto_escala.json"
+AGRUPADORES_ABAS = ("Meses", "DIMs")
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+
+
+def hash_trecho(trecho):
+    """Hash do texto JSON de uma aba: mesmo conteúdo => mesmo hash (e mesmo arquivo compilado)."""
+    return hashlib.sha256(trecho.encode("utf-8")).hexdigest()[:24]
+
+
+class IndiceAbas:
+    """Onde começa e termina cada aba dentro do texto JSON, sem guardar nada decodificado.
+
+    Indexa as chaves de primeiro nível (Pessoas, ESCALA 26 STAFF...) e as de dentro de
+    "Meses"/"DIMs". Para achar o fim de cada valor ele é decodificado e descartado na
+    hora, então o pico de memória é o da maior aba, não o do arquivo inteiro.
+    """
+
+    def __init__(self, texto, agrupadores=AGRUPADORES_ABAS):
+        self.texto = texto
+        self.trechos = {}  # {chave: (inicio, fim)}
+        self.grupos = {}  # {"Meses": {nome_aba: (inicio, fim)}, ...}
+        self._decoder = json.JSONDecoder()
+        if texto:
+            inicio = self._pular_espacos(0)
+            self.trechos, _ = self._varrer_objeto(inicio, agrupadores)
+
+    def _pular_espacos(self, pos):
+        return _ESPACOS.match(self.texto, pos).end()
+
+    def _esperar(self, pos, caractere):
+        pos = self._pular_espacos(pos)
+        if self.texto[pos:pos + 1] != caractere:
+            raise ValueError(f"JSON inválido na posição {pos}: esperava '{caractere}'")
+        return pos + 1
+
+    def _varrer_objeto(self, pos, agrupadores=()):
+        """({chave: (inicio, fim)}, fim_do_objeto) do objeto que começa em pos."""
+        posicoes = {}
+        pos = self._pular_espacos(self._esperar(pos, "{"))
+        if self.texto[pos:pos + 1] == "}":
+            return posicoes, pos + 1
+        while True:
+            chave, pos = self._decoder.raw_decode(self.texto, self._pular_espacos(pos))
+            inicio = self._pular_espacos(self._esperar(pos, ":"))
+            if chave in agrupadores and self.texto[inicio:inicio + 1] == "{":
+                self.grupos[chave], fim = self._varrer_objeto(inicio)
+            else:
+                _, fim = self._decoder.raw_decode(self.texto, inicio)
+            posicoes[chave] = (inicio, fim)
+            pos = self._pular_espacos(fim)
+            if self.texto[pos:pos + 1] != ",":
+                return posicoes, self._esperar(pos, "}")
+            pos += 1
+
+    def chaves(self):
+        return list(self.trechos)
+
+    def abas_do_grupo(self, grupo):
+        return list(self.grupos.get(grupo, {}))
+
+    def trecho(self, chave, aba=None):
+        """Texto JSON de uma chave de primeiro nível ou de uma aba dentro de um agrupador."""
+        posicoes = self.trechos if aba is None else self.grupos.get(chave, {})
+        inicio, fim = posicoes[chave if aba is None else aba]
+        return self.texto[inicio:fim]
+
+    def hash(self, chave, aba=None):
+        return hash_trecho(self.trecho(chave, aba))
+
+    def valor(self, chave, aba=None, padrao=None):
+        """Decodifica só essa parte do arquivo (a cada chamada; quem chama decide se guarda)."""
+        try:
+            trecho = self.trecho(chave, aba)
+        except KeyError:
+            return padrao
+        return json.loads(trecho)
+
+
+# ==========================================
+# ESCALA FATIADA: MANIFESTO + UM ARQUIVO POR ABA
+# ==========================================
+class ManifestoAbas:
+    """Mesma interface do IndiceAbas, lendo de manifesto_escala.json + um arquivo por aba.
+
+    manifesto: {"formato": 1, "abas": [{"grupo": "DIMs" | "Meses" | null, "nome": ...,
+    "arquivo": ..., "hash": ...}]}. O hash vem pronto do manifesto: decidir se uma aba
+    mudou não exige ler o arquivo dela.
+    """
+
+    def __init__(self, manifesto, arquivos):
+        self.arquivos = arquivos
+        self.trechos = {}  # {chave: entrada do manifesto}
+        self.grupos = {}  # {grupo: {nome_aba: entrada}}
+        for entrada in manifesto.get("abas", []):
+            grupo = entrada.get("grupo")
+            if grupo:
+                self.grupos.setdefault(grupo, {})[entrada["nome"]] = entrada
+            else:
+                self.trechos[entrada["nome"]] = entrada
+
+    def _entrada(self, chave, aba=None):
+        return self.trechos[chave] if aba is None else self.grupos.get(chave, {})[aba]
+
+    def chaves(self):
+        return list(self.trechos) + [g for g in self.grupos if g not in self.trechos]
+
+    def abas_do_grupo(self, grupo):
+        return list(self.grupos.get(grupo, {}))
+
+    def trecho(self, chave, aba=None):
+        return self.arquivos[self._entrada(chave, aba)["arquivo"]]
+
+    def hash(self, chave, aba=None):
+        return self._entrada(chave, aba)["hash"]
+
+    def valor(self, chave, aba=None, padrao=None):
+        try:
+            trecho = self.trecho(chave, aba)
+        except KeyError:
+            return padrao
+        return json.loads(trecho)
+
+
+def _nome_fatia(grupo, nome):
+    base = f"{grupo}/{nome}" if grupo else nome
+    legivel = re.sub(r"[^0-9A-Za-z]+", "_", base).strip("_").lower()
+    return f"escala_{legivel}_{hashlib.sha1(base.encode('utf-8')).hexdigest()[:6]}.json"
+
+
+def fatiar_escala(escala):
+    """Dict do escala_cx.json -> {nome_do_arquivo: conteúdo} no layout fatiado (com o manifesto)."""
+    arquivos = {}
+    entradas = []
+
+    def fatia(grupo, nome, valor):
+        trecho = json.dumps(valor, ensure_ascii=False, separators=(",", ":"))
+        arquivo = _nome_fatia(grupo, nome)
+        arquivos[arquivo] = trecho
+        entradas.append({"grupo": grupo, "nome": nome, "arquivo": arquivo, "hash": hash_trecho(trecho)})
+
+    for chave, valor in escala.items():
+        if chave in AGRUPADORES_ABAS and isinstance(valor, dict):
+            for nome, aba in valor.items():
+                fatia(chave, nome, aba)
+        else:
+            fatia(None, chave, valor)
+    arquivos[ARQUIVO_MANIFESTO] = json.dumps({"formato": 1, "abas": entradas}, ensure_ascii=False)
+    return arquivos
+
+
+class SnapshotGist:
+    """Uma versão imutável do Gist: conteúdo bruto de cada arquivo + ETag."""
+
+    def __init__(self, etag, arquivos, verificado_em=None):
+        self.etag = etag
+        self.arquivos = arquivos  # {nome_do_arquivo: conteudo_str}
+        self.verificado_em = verificado_em or time.time()
+        self.versao = self._calcular_versao(arquivos)
+        self._json = {}
+        self._indices = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _calcular_versao(arquivos):
+        h = hashlib.sha256()
+        for nome in sorted(arquivos):
+            h.update(nome.encode("utf-8"))
+            h.update(b"\0")
+            h.update(arquivos[nome].encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()[:16]
+
+    def json(self, nome_do_arquivo):
+        """Decodifica o arquivo uma única vez por versão (None se não existir)."""
+        if nome_do_arquivo not in self.arquivos:
+            return None
+        with self._lock:
+            if nome_do_arquivo not in self._json:
+                with TELEMETRIA.medir("json_decode"):
+                    self._json[nome_do_arquivo] = json.loads(self.arquivos[nome_do_arquivo])
+            return self._json[nome_do_arquivo]
+
+    def abas_escala(self):
+        """Abas da escala: pelo manifesto se o Gist estiver fatiado, senão indexando o escala_cx.json."""
+        manifesto = self.json(ARQUIVO_MANIFESTO)
+        if manifesto is not None:
+            return ManifestoAbas(manifesto, self.arquivos)
+        return self.indice(ARQUIVO_ESCALA)
+
+    def indice(self, nome_do_arquivo):
+        """IndiceAbas do arquivo (montado uma vez por versão); vazio se o arquivo não existir."""
+        with self._lock:
+            if nome_do_arquivo not in self._indices:
+                with TELEMETRIA.medir("indexar_abas"):
+                    self._indices[nome_do_arquivo] = IndiceAbas(self.arquivos.get(nome_do_arquivo, ""))
+            return self._indices[nome_do_arquivo]
+
+    def descartar_json(self):
+        """Libera os JSONs decodificados (o conteúdo bruto continua para reprocessar)."""
+        with self._lock:
+            self._json.clear()
+
+
+class ArmazemGist:
+    """Baixa o Gist uma vez, revalida com If-None-Match e persiste a última versão boa.
+
+    fonte: qualquer objeto com baixar(etag) (ver fontes_dados: GitHub, pasta local, Gist local).
+    """
+
+    def __init__(self, fonte, pasta_cache, ttl=600):
+        self.fonte = fonte
+        self.pasta_cache = pasta_cache
+        self.ttl = ttl
+        self.ultimo_erro = None
+        self.contadores = {"200": 0, "304": 0, "erros": 0, "disco": 0}
+        self._snapshot = None
+        self._lock_rede = threading.Lock()
+
+    # --- DISCO ---
+    def _caminho_disco(self):
+        return os.path.join(self.pasta_cache, NOME_ARQUIVO_DISCO)
+
+    def _carregar_do_disco(self):
+        try:
+            with open(self._caminho_disco(), encoding="utf-8") as f:
+                bruto = json.load(f)
+                gravado_em = os.fstat(f.fileno()).st_mtime
+            self.contadores["disco"] += 1
+            # Servimos na hora; verificado_em é a gravação do arquivo (não "agora"),
+            # então o atualizador sabe que esta cópia ainda precisa ser revalidada
+            return SnapshotGist(bruto.get("etag"), bruto["arquivos"], verificado_em=gravado_em)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _salvar_no_disco(self, snapshot):
+        try:
+            os.makedirs(self.pasta_cache, exist_ok=True)
+            caminho = self._caminho_disco()
+            # Temporário por processo e thread: dois downloads simultâneos não escrevem no mesmo arquivo
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump({"etag": snapshot.etag, "arquivos": snapshot.arquivos}, f, ensure_ascii=False)
+            # Troca atômica: outro processo nunca lê um arquivo pela metade
+            os.replace(temporario, caminho)
+        except OSError as e:
+            print(f"Erro ao salvar snapshot em disco: {e}")
+
+    # --- REDE ---
+    def _baixar(self, etag_atual):
+        with TELEMETRIA.medir("gist_download"):
+            resultado = self.fonte.baixar(etag_atual)
+        if resultado is None:
+            self.contadores["304"] += 1
+            return None
+        self.contadores["200"] += 1
+        etag, arquivos = resultado
+        return SnapshotGist(etag, arquivos)
+
+    def revalidar(self):
+        """Pergunta ao GitHub se mudou algo. Retorna True se trocou de versão."""
+        with self._lock_rede:
+            atual = self._snapshot
+            try:
+                novo = self._baixar(atual.etag if atual else None)
+            except Exception as e:
+                self.ultimo_erro = str(e)
+                self.contadores["erros"] += 1
+                return False
+
+            self.ultimo_erro = None
+            if novo is None:
+                atual.verificado_em = time.time()
+                return False
+
+            mudou = atual is None or novo.versao != atual.versao
+            if mudou:
+                self._salvar_no_disco(novo)
+                self._snapshot = novo
+            else:
+                atual.etag = novo.etag
+                atual.verificado_em = novo.verificado_em
+            return mudou
+
+    def atual(self):
+        """Snapshot vigente. Só bloqueia na rede se não houver nada em memória nem em disco."""
+        if self._snapshot is None:
+            with self._lock_rede:
+                if self._snapshot is None:
+                    self._snapshot = self._carregar_do_disco()
+            if self._snapshot is None:
+                self.revalidar()
+        elif time.time() - self._snapshot.verificado_em > self.ttl:
+            # Só uma thread revalida; as demais seguem com a versão atual
+            if not self._lock_rede.locked():
+                self.revalidar()
+        return self._snapshot
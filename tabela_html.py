@@ -0,0 +1,149 @@
+"""Renderização da grade da escala em HTML com classes CSS fixas (sem pandas Styler)."""
+import html
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from telemetria import TELEMETRIA
+
+# Nomes que marcam linhas separadoras de bloco (pintadas de preto)
+SEPARADORES_TABELA = ['FINANCEIRO', 'E-MAIL', 'ASSÍNCRONO', 'PLENO', 'STAFF', 'N2']
+
+# Uma regra por classe. Os seletores levam .tabela-escala para ganhar do
+# "table td:first-child" do CSS global, como os ids do Styler faziam.
+CSS_TABELA = """
+    .tabela-escala td.c-fr { background-color: #ffffff; color: black; }
+    .tabela-escala td.c-af { background-color: #f4cccc; color: black; }
+    .tabela-escala td.c-t { background-color: #c9daf8; color: black; }
+    .tabela-escala td.c-folga-mes { background-color: #93c47d; color: black; }
+    .tabela-escala td.c-folga-dia { background-color: #002060; color: white; }
+    .tabela-escala td.c-rt { background-color: #e6cff2; color: black; }
+    .tabela-escala td.c-reembolsos { background-color: #d4edbc; color: black; }
+    .tabela-escala td.c-chat { background-color: #d9ead3; color: black; }
+    .tabela-escala td.c-pausa { background-color: #fce5cd; color: black; }
+    .tabela-escala td.c-email { background-color: #bfe1f6; color: black; }
+    .tabela-escala td.c-financeiro { background-color: #11734b; color: white; }
+    .tabela-escala td.c-backoffice { background-color: #5a3286; color: white; }
+    .tabela-escala tr.sep td { background-color: #000000; color: white; font-weight: bold; }
+"""
+
+
+def classe_celula(val, modo_cores):
+    """Classe CSS de um valor de célula (mesmas regras de cor do antigo style_row)."""
+    val_str = str(val).upper().strip()
+    classe = ''
+
+    if val_str == 'FR': classe = 'c-fr'
+    elif val_str == 'AF': classe = 'c-af'
+
+    if modo_cores == 'mensal':
+        if val_str == 'T': classe = 'c-t'
+        elif val_str == 'F': classe = 'c-folga-mes'
+    else:
+        if val_str == 'F': classe = 'c-folga-dia'
+        elif val_str == 'RT': classe = 'c-rt'
+        elif val_str == 'REEMBOLSOS': classe = 'c-reembolsos'
+        elif 'CHAT' in val_str: classe = 'c-chat'
+        elif 'PAUSA' in val_str or val_str == 'P': classe = 'c-pausa'
+        elif 'EMAIL' in val_str or 'E-MAIL' in val_str: classe = 'c-email'
+        elif 'FINANCEIRO' in val_str: classe = 'c-financeiro'
+        elif 'BACKOFFICE' in val_str: classe = 'c-backoffice'
+    return classe
+
+
+@TELEMETRIA.cronometrar("renderizar_tabela")
+def renderizar_tabela_html(df, modo_cores='diario', classe_altura='height-diaria'):
+    valores = df.to_numpy(dtype=object)
+
+    # A escala tem poucas dezenas de valores distintos: classificamos cada um
+    # uma vez e espalhamos para a grade inteira por indexação.
+    codigos, unicos = pd.factorize(valores.ravel(), use_na_sentinel=False)
+    classes_unicos = np.array([classe_celula(v, modo_cores) for v in unicos], dtype=object)
+    abre_unicos = np.array([f'<td class="{c}">' if c else '<td>' for c in classes_unicos], dtype=object)
+    textos_unicos = np.array([html.escape(str(v)) for v in unicos], dtype=object)
+
+    celulas = (abre_unicos[codigos] + textos_unicos[codigos] + '</td>').reshape(valores.shape)
+
+    if 'NOME' in df.columns:
+        eh_separador = df['NOME'].astype(str).str.upper().str.strip().isin(SEPARADORES_TABELA).to_numpy()
+    else:
+        eh_separador = np.zeros(len(df), dtype=bool)
+
+    cabecalho = ''.join(f'<th>{html.escape(str(c))}</th>' for c in df.columns)
+    corpo = ''.join(
+        ('<tr class="sep">' if sep else '<tr>') + ''.join(linha) + '</tr>'
+        for sep, linha in zip(eh_separador, celulas)
+    )
+    tabela = f'<table class="tabela-escala"><thead><tr>{cabecalho}</tr></thead><tbody>{corpo}</tbody></table>'
+    return f'<div class="table-container {classe_altura}">{tabela}</div>'
+
+
+def calcular_janela_datas(colunas_datas, dia_centro, antes, depois):
+    """Fatia [inicio, fim) das colunas de data ao redor do dia selecionado."""
+    if not colunas_datas:
+        return 0, 0
+    centro = colunas_datas.index(dia_centro) if dia_centro in colunas_datas else 0
+    return max(0, centro - antes), min(len(colunas_datas), centro + depois + 1)
+
+
+def recortar_janela(df, colunas_moveis, colunas_visiveis, n_linhas):
+    """Só o pedaço da grade que vai para o navegador: n_linhas primeiras e as colunas
+    móveis (datas) visíveis. As demais colunas ficam sempre, na ordem original."""
+    ocultas = set(colunas_moveis) - set(colunas_visiveis)
+    cols = [c for c in df.columns if c not in ocultas]
+    return df.iloc[:n_linhas][cols]
+
+
+class CacheTabelas:
+    """LRU por processo do HTML já renderizado, limitado por quantidade e por bytes.
+
+    A versão do dataset faz parte da chave: um leitor que ainda segura a versão
+    anterior não apaga a nova, e o que sobra da versão velha sai pelo LRU.
+    """
+
+    def __init__(self, max_itens=200, max_bytes=64 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _descartar_mais_antigo(self):
+        _, html_antigo = self._itens.popitem(last=False)
+        self._bytes -= len(html_antigo)
+
+    def obter(self, versao, chave, gerar):
+        """HTML da chave; chama gerar() só em caso de miss (fora do lock)."""
+        chave = (versao, chave)
+        with self._lock:
+            html_tabela = self._itens.get(chave)
+            if html_tabela is not None:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return html_tabela
+            self.misses += 1
+
+        html_tabela = gerar()
+
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = html_tabela
+                self._bytes += len(html_tabela)
+                while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                    self._descartar_mais_antigo()
+        return html_tabela
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": self.hits / total if total else 0.0,
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,150 @@
+"""Tempos por etapa (p50/p95), contadores e exportação em texto Prometheus/JSON."""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+AMOSTRAS_POR_SERIE = 500
+NOME_ARQUIVO_PROM = "metricas_app.prom"
+NOME_ARQUIVO_JSON = "metricas_app.json"
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por posição mais próxima de uma lista já ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    pos = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[pos]
+
+
+class Telemetria:
+    """Séries (últimas N observações) do processo + contadores das fontes registradas, seguros entre threads.
+
+    Convenção de nomes: tempos em segundos com sufixo "_segundos", tamanhos com "_bytes".
+    """
+
+    def __init__(self, amostras=AMOSTRAS_POR_SERIE):
+        self.amostras = amostras
+        self._series = {}  # {nome: deque de valores}
+        self._totais = {}  # {nome: [quantidade, soma]} desde o início do processo
+        self._fontes = {}  # {prefixo: função que devolve {nome: número}}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def observar(self, nome, valor):
+        with self._lock:
+            serie = self._series.get(nome)
+            if serie is None:
+                serie = self._series[nome] = deque(maxlen=self.amostras)
+                self._totais[nome] = [0, 0.0]
+            serie.append(valor)
+            total = self._totais[nome]
+            total[0] += 1
+            total[1] += valor
+
+    @contextmanager
+    def medir(self, etapa):
+        """with TELEMETRIA.medir("etapa"): ... -> observa "etapa_segundos"."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(f"{etapa}_segundos", time.perf_counter() - inicio)
+
+    def cronometrar(self, etapa):
+        """Decorador: cada chamada da função vira uma observação de "etapa_segundos"."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                with self.medir(etapa):
+                    return funcao(*args, **kwargs)
+            return medida
+        return decorador
+
+    def registrar_fonte(self, prefixo, funcao):
+        """Valores lidos na hora do resumo (ex.: estatisticas() do cache de tabelas)."""
+        with self._lock:
+            self._fontes[prefixo] = funcao
+
+    def resumo(self):
+        """{"series": {nome: {n, p50, p95, max, quantidade, soma}}, "contadores": {...}}"""
+        with self._lock:
+            series = {nome: sorted(serie) for nome, serie in self._series.items()}
+            totais = {nome: tuple(t) for nome, t in self._totais.items()}
+            fontes = dict(self._fontes)
+
+        # Contadores vêm das fontes (cada objeto mantém os seus e é lido aqui)
+        contadores = {}
+        for prefixo, funcao in fontes.items():
+            try:
+                valores = funcao() or {}
+            except Exception:
+                continue
+            for nome, valor in valores.items():
+                if isinstance(valor, (int, float)):
+                    contadores[f"{prefixo}_{nome}"] = valor
+
+        return {
+            "series": {
+                nome: {
+                    "n": len(valores), "p50": percentil(valores, 50), "p95": percentil(valores, 95),
+                    "max": valores[-1] if valores else 0.0,
+                    "quantidade": totais[nome][0], "soma": totais[nome][1],
+                }
+                for nome, valores in series.items()
+            },
+            "contadores": contadores,
+        }
+
+    # --- EXPORTAÇÃO ---
+    @staticmethod
+    def texto_prometheus(resumo, prefixo="escala"):
+        linhas = []
+        for nome, serie in sorted(resumo["series"].items()):
+            metrica = f"{prefixo}_{nome}"
+            linhas.append(f"# TYPE {metrica} summary")
+            linhas.append(f'{metrica}{{quantile="0.5"}} {serie["p50"]}')
+            linhas.append(f'{metrica}{{quantile="0.95"}} {serie["p95"]}')
+            linhas.append(f"{metrica}_sum {serie['soma']}")
+            linhas.append(f"{metrica}_count {serie['quantidade']}")
+        for nome, valor in sorted(resumo["contadores"].items()):
+            linhas.append(f"# TYPE {prefixo}_{nome} gauge")
+            linhas.append(f"{prefixo}_{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    @staticmethod
+    def _gravar_atomico(caminho, conteudo):
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+
+    def exportar(self, pasta):
+        """Grava metricas_app.prom e metricas_app.json (troca atômica, o coletor nunca lê pela metade)."""
+        resumo = self.resumo()
+        resumo["gerado_em"] = time.time()
+        resumo["pid"] = os.getpid()
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            self._gravar_atomico(os.path.join(pasta, NOME_ARQUIVO_PROM), self.texto_prometheus(resumo))
+            self._gravar_atomico(os.path.join(pasta, NOME_ARQUIVO_JSON), json.dumps(resumo, ensure_ascii=False))
+        except OSError as e:
+            print(f"Erro ao exportar métricas: {e}")
+
+    def iniciar_exportacao(self, pasta, intervalo=30):
+        """Thread daemon que exporta a cada `intervalo` segundos."""
+        if self._thread is None:
+            def loop():
+                while True:
+                    time.sleep(intervalo)
+                    self.exportar(pasta)
+            self._thread = threading.Thread(target=loop, name="exportador-metricas", daemon=True)
+            self._thread.start()
+        return self
+
+
+# Registro único do processo: os módulos de dados medem direto aqui
+TELEMETRIA = Telemetria()
@@ -0,0 +1,49 @@
+"""Conferência Mês x DIMs: linhas da DIM sem CHAT também contam como horário."""
+from consistencia_escala import AUSENTE_DA_DIM, ESCALADO_SEM_HORARIO, FOLGA_COM_CHAT, RelatorioConsistencia
+from dataset_escala import codificar_aba, parse_aba
+from kpis_escala import MatrizAtividadesDim
+
+MES = [
+    ["ESCALA OUTUBRO 2026", "", "", "", ""],
+    ["NOME", "LÍDER", "ILHA", "ADMISSÃO", "01/10"],
+    ["Ana", "Líder 1", "Suporte", "01/01/2024", "T"],
+    ["Bia", "Líder 1", "Suporte", "01/01/2024", "T"],
+    ["Caio", "Líder 1", "Suporte", "01/01/2024", "T"],
+    ["Duda", "Líder 1", "Suporte", "01/01/2024", "F"],
+    ["Enzo", "Líder 1", "Suporte", "01/01/2024", "T"],
+    ["Fabi", "Líder 1", "Suporte", "01/01/2024", "T"],
+]
+
+DIM = [
+    ["NOME", "LÍDER", "ILHA", "ENTRADA", "HORÁRIO", "09:00", "10:00", "11:00"],
+    ["Ana", "Líder 1", "Suporte", "09:00", "09:00 - 18:00", "REEMBOLSOS", "RT", "REEMBOLSOS"],
+    ["Bia", "Líder 1", "Suporte", "09:00", "09:00 - 18:00", "BACKOFFICE", "BACKOFFICE", ""],
+    ["Caio", "Líder 1", "Suporte", "", "FOLGA", "F", "F", "F"],
+    ["Duda", "Líder 1", "Suporte", "09:00", "09:00 - 18:00", "CHAT", "CHAT", "P"],
+    ["Enzo", "Líder 1", "Suporte", "09:00", "09:00 - 18:00", "CHAT", "EMAIL", "P"],
+]
+
+
+def montar_relatorio():
+    df_mes = codificar_aba(parse_aba(MES))
+    df_dim = codificar_aba(parse_aba(DIM))
+    return RelatorioConsistencia("OUTUBRO", df_mes, [("01/10", df_dim, MatrizAtividadesDim(df_dim))])
+
+
+def problemas_por_nome(relatorio):
+    return dict(zip(relatorio.divergencias["Nome"], relatorio.divergencias["Problema"]))
+
+
+def test_linhas_sem_chat_contam_como_horario():
+    problemas = problemas_por_nome(montar_relatorio())
+    assert "Ana" not in problemas  # só REEMBOLSOS / RT
+    assert "Bia" not in problemas  # só BACKOFFICE
+    assert "Enzo" not in problemas
+
+
+def test_divergencias_reais_continuam_apontadas():
+    problemas = problemas_por_nome(montar_relatorio())
+    assert problemas["Caio"] == ESCALADO_SEM_HORARIO
+    assert problemas["Duda"] == FOLGA_COM_CHAT
+    assert problemas["Fabi"] == AUSENTE_DA_DIM
+    assert len(problemas) == 3